@@ -0,0 +1,340 @@
+"""Streaming export/import of users, posts (with likes and comments) and images.
+
+The archive is an uncompressed tar written and read sequentially:
+
+    manifest.json
+    users/000000.ndjson     one JSON user per line, hashed passwords included
+    posts/000000.ndjson     one JSON post per line, likes and comments nested
+    images/<filename>       uploaded images referenced by posts
+
+Rows are exported in batches of ``BATCH_SIZE`` and each batch becomes its own
+member, so neither side ever holds a whole table in memory.
+
+Command line, from the backend directory:
+
+    python -m app.bulk export backup.tar
+    python -m app.bulk import backup.tar
+"""
+import argparse
+import io
+import json
+import sys
+import tarfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from . import crud, models
+from .core.config import settings
+
+ARCHIVE_FORMAT = 1
+BATCH_SIZE = 1000
+
+USER_FIELDS = ("email", "username", "hashed_password", "bio", "created_at")
+POST_FIELDS = ("title", "text_content", "image_filename", "created_at", "updated_at")
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _with_created_at(row: Dict[str, Any], value: Optional[str]) -> Dict[str, Any]:
+    # Without a timestamp the key is left out, so the column's server default
+    # applies instead of an explicit NULL
+    created_at = _parse_datetime(value)
+    if created_at is None:
+        row.pop("created_at", None)
+    else:
+        row["created_at"] = created_at
+    return row
+
+
+def _plain_filename(name: Optional[str]) -> Optional[str]:
+    # Image names from an archive must not be paths, or they could point outside the uploads directory
+    return name if name and Path(name).name == name else None
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only file object collecting tar output until it is drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _add_bytes(tar: tarfile.TarFile, name: str, data: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    tar.addfile(info, io.BytesIO(data))
+
+
+def _ndjson(records: Iterable[Dict[str, Any]]) -> bytes:
+    return b"".join(json.dumps(record, default=_json_default).encode() + b"\n" for record in records)
+
+
+def _user_record(row) -> Dict[str, Any]:
+    record = {field: row[field] for field in USER_FIELDS}
+    record["id"] = row["id"]
+    return record
+
+
+def _post_records(db: Session, posts) -> List[Dict[str, Any]]:
+    post_ids = [post["id"] for post in posts]
+    likes: Dict[int, List[Dict[str, Any]]] = {}
+    for like in crud.get_rows_for_posts(db, models.Like, post_ids):
+        likes.setdefault(like["post_id"], []).append({"owner_id": like["owner_id"], "created_at": like["created_at"]})
+    comments: Dict[int, List[Dict[str, Any]]] = {}
+    for comment in crud.get_rows_for_posts(db, models.Comment, post_ids):
+        comments.setdefault(comment["post_id"], []).append(
+            {"owner_id": comment["owner_id"], "text": comment["text"], "created_at": comment["created_at"]}
+        )
+
+    records = []
+    for post in posts:
+        record = {field: post[field] for field in POST_FIELDS}
+        record["id"] = post["id"]
+        record["owner_id"] = post["owner_id"]
+        record["likes"] = likes.get(post["id"], [])
+        record["comments"] = comments.get(post["id"], [])
+        records.append(record)
+    return records
+
+
+def _upload_path(uploads_dir: Path, filename: Optional[str]) -> Optional[Path]:
+    """The image file for ``filename``, or None unless it is a file inside ``uploads_dir``."""
+    if not filename:
+        return None
+    path = (uploads_dir / filename).resolve()
+    if uploads_dir not in path.parents or not path.is_file():
+        return None
+    return path
+
+
+def export_archive(db: Session, uploads_dir: Optional[Path] = None) -> Iterator[bytes]:
+    """Yield the archive as a sequence of byte chunks.
+
+    All tables are read in one snapshot, so likes and comments never refer
+    to users who signed up while the export was running.
+    """
+    uploads_dir = Path(uploads_dir or settings.UPLOADS_DIR).resolve()
+    buffer = _ChunkBuffer()
+    crud.begin_snapshot(db)
+    try:
+        with tarfile.open(fileobj=buffer, mode="w|") as tar:
+            _add_bytes(tar, "manifest.json", json.dumps({"format": ARCHIVE_FORMAT}).encode())
+
+            for number, users in enumerate(crud.iter_table_batches(db, models.User, BATCH_SIZE)):
+                _add_bytes(tar, f"users/{number:06d}.ndjson", _ndjson(_user_record(user) for user in users))
+                yield buffer.drain()
+
+            for number, posts in enumerate(crud.iter_table_batches(db, models.Post, BATCH_SIZE)):
+                posts = [post for post in posts if post["deleted_at"] is None]
+                if not posts:
+                    continue
+                _add_bytes(tar, f"posts/{number:06d}.ndjson", _ndjson(_post_records(db, posts)))
+                yield buffer.drain()
+                # Each batch's images follow its posts
+                for post in posts:
+                    path = _upload_path(uploads_dir, post["image_filename"])
+                    if path is not None:
+                        tar.add(str(path), arcname=f"images/{post['image_filename']}")
+                        yield buffer.drain()
+        yield buffer.drain()
+    finally:
+        db.rollback() # Read-only; ends the snapshot
+
+
+class _Importer:
+    """Inserts archive batches, remapping ids onto the target database.
+
+    Users are matched by email; new users and all posts get ids assigned by
+    the database, read back with RETURNING so each batch's likes and comments
+    can point at their posts. Nothing is committed here: import_archive
+    commits once at the end, so a failed import leaves no rows behind.
+    """
+
+    def __init__(self, db: Session, uploads_dir: Path):
+        self.db = db
+        self.uploads_dir = uploads_dir
+        self.emails, self.usernames = crud.get_user_identity_maps(db)
+        self.user_ids: Dict[int, int] = {}
+        self.written_images: List[Path] = []
+        self.counts = {"users": 0, "posts": 0, "likes": 0, "comments": 0, "images": 0}
+
+    def _unique_username(self, username: str) -> str:
+        candidate, suffix = username, 1
+        while candidate in self.usernames:
+            suffix += 1
+            candidate = f"{username}-{suffix}"
+        return candidate
+
+    def _owner_id(self, archived_id: int) -> int:
+        try:
+            return self.user_ids[archived_id]
+        except KeyError:
+            raise ValueError(f"Archive references unknown user id {archived_id}")
+
+    def add_users(self, records: Iterable[Dict[str, Any]]):
+        rows, archived_ids = [], []
+        for record in records:
+            existing_id = self.emails.get(record["email"])
+            if existing_id is not None:
+                self.user_ids[record["id"]] = existing_id
+                continue
+            row = {field: record.get(field) for field in USER_FIELDS}
+            row["username"] = self._unique_username(record["username"])
+            _with_created_at(row, record.get("created_at"))
+            self.usernames.add(row["username"])
+            rows.append(row)
+            archived_ids.append(record["id"])
+        new_ids = crud.bulk_insert_returning_ids(self.db, models.User, rows)
+        for archived_id, row, new_id in zip(archived_ids, rows, new_ids):
+            self.user_ids[archived_id] = new_id
+            self.emails[row["email"]] = new_id
+        self.counts["users"] += len(rows)
+
+    def add_posts(self, records: Iterable[Dict[str, Any]]):
+        records = list(records)
+        posts = []
+        for record in records:
+            row = {field: record.get(field) for field in POST_FIELDS}
+            row["owner_id"] = self._owner_id(record["owner_id"])
+            row["image_filename"] = _plain_filename(record.get("image_filename"))
+            _with_created_at(row, record.get("created_at"))
+            row["updated_at"] = _parse_datetime(record.get("updated_at"))
+            posts.append(row)
+        post_ids = crud.bulk_insert_returning_ids(self.db, models.Post, posts)
+
+        likes, comments = [], []
+        for record, post_id in zip(records, post_ids):
+            for like in record.get("likes", []):
+                likes.append(_with_created_at({
+                    "post_id": post_id,
+                    "owner_id": self._owner_id(like["owner_id"]),
+                }, like.get("created_at")))
+            for comment in record.get("comments", []):
+                comments.append(_with_created_at({
+                    "post_id": post_id,
+                    "owner_id": self._owner_id(comment["owner_id"]),
+                    "text": comment["text"],
+                }, comment.get("created_at")))
+        crud.bulk_insert(self.db, models.Like, likes)
+        crud.bulk_insert(self.db, models.Comment, comments)
+        self.counts["posts"] += len(posts)
+        self.counts["likes"] += len(likes)
+        self.counts["comments"] += len(comments)
+
+    def add_image(self, filename: str, data: BinaryIO):
+        if _plain_filename(filename) is None:
+            return
+        destination = self.uploads_dir / filename
+        if destination.exists():
+            return
+        with destination.open("wb") as out:
+            while True:
+                chunk = data.read(1024 * 1024)
+                if not chunk:
+                    break
+                out.write(chunk)
+        self.written_images.append(destination)
+        self.counts["images"] += 1
+
+    def discard_images(self):
+        for path in self.written_images:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _read_ndjson(data: BinaryIO) -> Iterator[Dict[str, Any]]:
+    for line in data:
+        if line.strip():
+            yield json.loads(line)
+
+
+def import_archive(db: Session, fileobj: BinaryIO, uploads_dir: Optional[Path] = None) -> Dict[str, int]:
+    """Read an archive produced by ``export_archive`` and return per-kind counts of what was added.
+
+    The whole import is one transaction. On any error it is rolled back,
+    images written so far are removed and the error is re-raised.
+    """
+    uploads_dir = Path(uploads_dir or settings.UPLOADS_DIR)
+    uploads_dir.mkdir(parents=True, exist_ok=True)
+    importer = _Importer(db, uploads_dir)
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                data = tar.extractfile(member)
+                if member.name == "manifest.json":
+                    manifest = json.load(data)
+                    if manifest.get("format") != ARCHIVE_FORMAT:
+                        raise ValueError(f"Unsupported archive format {manifest.get('format')}")
+                elif member.name.startswith("users/"):
+                    importer.add_users(_read_ndjson(data))
+                elif member.name.startswith("posts/"):
+                    importer.add_posts(_read_ndjson(data))
+                elif member.name.startswith("images/"):
+                    importer.add_image(member.name[len("images/"):], data)
+        db.commit()
+    except Exception:
+        db.rollback()
+        importer.discard_images()
+        raise
+    crud.bump_feed_version()
+    return importer.counts
+
+
+def main(argv: Optional[List[str]] = None):
+    from .db.database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(prog="python -m app.bulk", description="Export or import posts, users and images.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Write an archive ('-' for stdout)")
+    export_parser.add_argument("path")
+    import_parser = subparsers.add_parser("import", help="Load an archive ('-' for stdin)")
+    import_parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.command == "export":
+            out = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+            with out:
+                for chunk in export_archive(db):
+                    out.write(chunk)
+        else:
+            source = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+            with source:
+                counts = import_archive(db, source)
+            print(", ".join(f"{count} {kind}" for kind, count in counts.items()), file=sys.stderr)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
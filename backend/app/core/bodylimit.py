@@ -0,0 +1,65 @@
+"""ASGI middleware capping request body size.
+
+FastAPI reads (and Starlette spools to disk) a whole multipart body before
+any dependency runs, so size limits have to be enforced while the body is
+received. A request whose Content-Length is too large is rejected without
+reading it; otherwise bytes are counted as they arrive, which also covers
+chunked requests that send no Content-Length.
+"""
+from typing import Dict, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app: ASGIApp, max_bytes: int, max_bytes_by_path: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_bytes_by_path = max_bytes_by_path or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = self.max_bytes_by_path.get(scope["path"], self.max_bytes)
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    if not response_started and not rejected:
+                        rejected = True
+                        await self._reject(scope, receive, send)
+                    # Whatever is parsing the body now sees a disconnect and gives up
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            if rejected:
+                return # The 413 has been sent; drop the app's own error response
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not rejected:
+                raise
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse(status_code=413, content={"detail": "Request body too large."}, headers={"Connection": "close"})
+        await response(scope, receive, send)
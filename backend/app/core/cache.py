@@ -0,0 +1,451 @@
+"""Cache and invalidation-channel backends.
+
+The "memory" backend keeps everything inside the current process and is the
+default for a single uvicorn worker. The "shared" backend talks to a cache
+server listening on a local socket, so every worker started by gunicorn sees
+the same entries and the same invalidation messages.
+
+Run the cache server on its own with ``python -m app.core.cache``; the
+gunicorn config starts one automatically.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from multiprocessing.managers import BaseManager
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
+
+from .config import settings
+
+Address = Union[str, Tuple[str, int]]
+
+
+class MemoryCache:
+    """Thread-safe key/value store with optional per-entry TTL (in seconds)."""
+
+    SWEEP_EVERY = 1024 # Writes between sweeps of expired entries
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _get_entry(self, key: str, now: float):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def _store(self, key: str, value: Any, ttl: Optional[float], now: float):
+        self._data[key] = (value, now + ttl if ttl else None)
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            expired = [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]
+            for k in expired:
+                del self._data[k]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._get_entry(key, time.monotonic())
+            return default if entry is None else entry[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._store(key, value, ttl, time.monotonic())
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Set ``key`` only if it is missing. Returns whether it was set."""
+        with self._lock:
+            now = time.monotonic()
+            if self._get_entry(key, now) is not None:
+                return False
+            self._store(key, value, ttl, now)
+            return True
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        # A fresh counter gets the TTL; incrementing an existing one keeps its expiry
+        with self._lock:
+            now = time.monotonic()
+            entry = self._get_entry(key, now)
+            if entry is None:
+                self._store(key, amount, ttl, now)
+                return amount
+            value = entry[0] + amount
+            self._data[key] = (value, entry[1])
+            return value
+
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """Token bucket holding up to ``capacity`` tokens, refilled at ``rate`` per second.
+
+        Takes ``cost`` tokens and returns 0.0, or returns the seconds until
+        enough tokens are available without taking any. Buckets expire once
+        they would be full again, so idle clients cost no memory.
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry = self._get_entry(key, now)
+            tokens, last = entry[0] if entry is not None else (capacity, now)
+            tokens = min(capacity, tokens + (now - last) * rate)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / rate
+            self._store(key, (tokens, now), max((capacity - tokens) / rate, 1.0), now)
+            return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class LocalBus:
+    """In-process publish/subscribe channel."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callable[[Any], None]]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, message: Any) -> None:
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            callback(message)
+
+    def subscribe(self, channel: str, callback: Callable[[Any], None]) -> None:
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(callback)
+
+    def unsubscribe(self, channel: str, callback: Callable[[Any], None]) -> None:
+        with self._lock:
+            callbacks = self._subscribers.get(channel, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+
+class BusHub:
+    """Server-side fan-out of published messages into per-process mailboxes.
+
+    Each worker opens one mailbox and long-polls it from a listener thread.
+    Mailboxes are bounded, and ones nobody has polled for a while (e.g. from a
+    worker that was killed) are dropped.
+    """
+
+    MAILBOX_SIZE = 10000
+    MAILBOX_IDLE_SECONDS = 60.0
+
+    def __init__(self):
+        self._mailboxes: Dict[str, Tuple[Set[str], Deque[Tuple[str, Any]]]] = {}
+        self._last_poll: Dict[str, float] = {}
+        self._cond = threading.Condition()
+
+    def open(self) -> str:
+        mailbox_id = uuid.uuid4().hex
+        with self._cond:
+            self._mailboxes[mailbox_id] = (set(), deque(maxlen=self.MAILBOX_SIZE))
+            self._last_poll[mailbox_id] = time.monotonic()
+        return mailbox_id
+
+    def listen(self, mailbox_id: str, channel: str) -> None:
+        with self._cond:
+            if mailbox_id in self._mailboxes:
+                self._mailboxes[mailbox_id][0].add(channel)
+
+    def close(self, mailbox_id: str) -> None:
+        with self._cond:
+            self._mailboxes.pop(mailbox_id, None)
+            self._last_poll.pop(mailbox_id, None)
+
+    def publish(self, channel: str, message: Any) -> None:
+        with self._cond:
+            stale_before = time.monotonic() - self.MAILBOX_IDLE_SECONDS
+            for mailbox_id in [m for m, t in self._last_poll.items() if t < stale_before]:
+                self._mailboxes.pop(mailbox_id, None)
+                del self._last_poll[mailbox_id]
+            for channels, messages in self._mailboxes.values():
+                if channel in channels:
+                    messages.append((channel, message))
+            self._cond.notify_all()
+
+    def poll(self, mailbox_id: str, timeout: float = 1.0) -> Optional[List[Tuple[str, Any]]]:
+        """Wait up to ``timeout`` for messages. Returns None if the mailbox is gone."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                mailbox = self._mailboxes.get(mailbox_id)
+                if mailbox is None:
+                    return None
+                self._last_poll[mailbox_id] = time.monotonic()
+                messages = mailbox[1]
+                if messages:
+                    drained = list(messages)
+                    messages.clear()
+                    return drained
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+
+
+class SharedBus:
+    """Client side of ``BusHub`` with the same interface as ``LocalBus``.
+
+    Callbacks run on a background listener thread. If the cache server
+    restarts, the listener reconnects and opens a new mailbox; messages
+    published while it was away are lost.
+    """
+
+    POLL_TIMEOUT = 1.0
+    RECONNECT_DELAY = 1.0
+
+    def __init__(self, connection: "SharedConnection"):
+        self._connection = connection
+        self._local = LocalBus()
+        self._channels: Set[str] = set()
+        self._mailbox_id: Optional[str] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _hub(self, method: str, *args: Any) -> Any:
+        return self._connection.call("hub", method, *args)
+
+    def publish(self, channel: str, message: Any) -> None:
+        self._hub("publish", channel, message)
+
+    def subscribe(self, channel: str, callback: Callable[[Any], None]) -> None:
+        self._local.subscribe(channel, callback)
+        with self._lock:
+            self._channels.add(channel)
+            if self._mailbox_id is None:
+                self._mailbox_id = self._hub("open")
+            self._hub("listen", self._mailbox_id, channel)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="cache-bus-listener", daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, channel: str, callback: Callable[[Any], None]) -> None:
+        self._local.unsubscribe(channel, callback)
+
+    def _reopen(self) -> None:
+        with self._lock:
+            self._mailbox_id = self._hub("open")
+            for channel in self._channels:
+                self._hub("listen", self._mailbox_id, channel)
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                messages = self._hub("poll", self._mailbox_id, self.POLL_TIMEOUT)
+                if messages is None: # Mailbox expired, or the server restarted and never knew it
+                    self._reopen()
+                    continue
+            except (EOFError, OSError):
+                # The server is down; each retry reconnects
+                time.sleep(self.RECONNECT_DELAY)
+                continue
+            for channel, message in messages:
+                self._local.publish(channel, message)
+
+
+class SharedCache:
+    """``MemoryCache`` interface forwarded to the cache server."""
+
+    def __init__(self, connection: "SharedConnection"):
+        self._connection = connection
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._connection.call("store", "get", key, default)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._connection.call("store", "set", key, value, ttl)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return self._connection.call("store", "add", key, value, ttl)
+
+    def delete(self, key: str) -> bool:
+        return self._connection.call("store", "delete", key)
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        return self._connection.call("store", "incr", key, amount, ttl)
+
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        return self._connection.call("store", "take", key, rate, capacity, cost)
+
+    def clear(self) -> None:
+        self._connection.call("store", "clear")
+
+
+# --- Cache server ---
+
+class CacheManager(BaseManager):
+    pass
+
+
+_server_store: Optional[MemoryCache] = None
+_server_hub: Optional[BusHub] = None
+
+
+def _get_server_store() -> MemoryCache:
+    global _server_store
+    if _server_store is None:
+        _server_store = MemoryCache()
+    return _server_store
+
+
+def _get_server_hub() -> BusHub:
+    global _server_hub
+    if _server_hub is None:
+        _server_hub = BusHub()
+    return _server_hub
+
+
+CacheManager.register("get_store", callable=_get_server_store)
+CacheManager.register("get_hub", callable=_get_server_hub)
+
+
+def parse_address(value: str) -> Address:
+    """"host:port" becomes a TCP address, anything else is a Unix socket path."""
+    host, sep, port = value.rpartition(":")
+    if sep and port.isdigit() and "/" not in value:
+        return (host, int(port))
+    return value
+
+
+def _make_manager(address: Optional[str], authkey: Optional[str]) -> CacheManager:
+    return CacheManager(
+        address=parse_address(address or settings.CACHE_ADDRESS),
+        authkey=(authkey or settings.CACHE_AUTHKEY).encode(),
+    )
+
+
+def _remove_stale_socket(address: Address) -> None:
+    if isinstance(address, str) and os.path.exists(address):
+        os.unlink(address)
+
+
+def start_server(address: Optional[str] = None, authkey: Optional[str] = None) -> CacheManager:
+    """Start the cache server in a child process. Call ``shutdown()`` on the result to stop it."""
+    manager = _make_manager(address, authkey)
+    _remove_stale_socket(manager.address)
+    manager.start()
+    return manager
+
+
+def serve(address: Optional[str] = None, authkey: Optional[str] = None) -> None:
+    """Run the cache server in the foreground."""
+    manager = _make_manager(address, authkey)
+    _remove_stale_socket(manager.address)
+    manager.get_server().serve_forever()
+
+
+def ping(address: Optional[str] = None, authkey: Optional[str] = None) -> bool:
+    """Whether a cache server is answering at ``address``."""
+    try:
+        _make_manager(address, authkey).connect()
+    except (EOFError, OSError):
+        return False
+    return True
+
+
+def _drop_thread_connection(proxy: Any) -> None:
+    # Proxies for the same address share each thread's connection (kept in
+    # BaseProxy._tls), so new proxies would reuse the broken one
+    connection = getattr(proxy._tls, "connection", None)
+    if connection is not None:
+        del proxy._tls.connection
+        connection.close()
+
+
+class SharedConnection:
+    """Proxies for the cache server's store and hub, rebuilt after it restarts.
+
+    A call that fails because the connection broke drops the proxies,
+    reconnects and is retried once. If the server is still down the error
+    is raised; the next call tries again.
+    """
+
+    def __init__(self, address: Optional[str] = None, authkey: Optional[str] = None):
+        self._address = address
+        self._authkey = authkey
+        self._lock = threading.Lock()
+        self._proxies: Optional[Dict[str, Any]] = None
+        self._generation = 0
+        self.cache = SharedCache(self)
+        self.bus = SharedBus(self)
+
+    def _current(self) -> Tuple[int, Dict[str, Any]]:
+        with self._lock:
+            if self._proxies is None:
+                manager = _make_manager(self._address, self._authkey)
+                manager.connect()
+                self._proxies = {"store": manager.get_store(), "hub": manager.get_hub()}
+                self._generation += 1
+            return self._generation, self._proxies
+
+    def _reset(self, generation: int) -> None:
+        with self._lock:
+            # Another thread may already have reconnected
+            if self._generation == generation:
+                self._proxies = None
+
+    def call(self, target: str, method: str, *args: Any) -> Any:
+        for attempt in range(2):
+            generation, proxies = self._current()
+            try:
+                return getattr(proxies[target], method)(*args)
+            except (EOFError, OSError):
+                _drop_thread_connection(proxies[target])
+                self._reset(generation)
+                if attempt:
+                    raise
+
+    def connect(self) -> None:
+        self._current()
+
+
+def connect(address: Optional[str] = None, authkey: Optional[str] = None) -> Tuple[SharedCache, SharedBus]:
+    """Connect to a running cache server and return its (cache, bus) pair."""
+    connection = SharedConnection(address, authkey)
+    connection.connect()
+    return connection.cache, connection.bus
+
+
+# --- Backend selection ---
+
+_local_cache = MemoryCache()
+_local_bus = LocalBus()
+_shared: Dict[str, Any] = {}
+_shared_lock = threading.Lock()
+
+
+def _shared_backends() -> Dict[str, Any]:
+    # Connections and listener threads don't survive a fork, so each worker
+    # process opens its own on first use. SharedConnection reconnects by
+    # itself if the cache server restarts.
+    with _shared_lock:
+        if _shared.get("pid") != os.getpid():
+            connection = SharedConnection()
+            _shared.update(pid=os.getpid(), cache=connection.cache, bus=connection.bus)
+        return _shared
+
+
+def get_cache():
+    if settings.CACHE_BACKEND == "shared":
+        return _shared_backends()["cache"]
+    return _local_cache
+
+
+def get_bus():
+    if settings.CACHE_BACKEND == "shared":
+        return _shared_backends()["bus"]
+    return _local_bus
+
+
+if __name__ == "__main__":
+    serve()
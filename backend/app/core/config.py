@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 from pathlib import Path
+from typing import List
 
 env_path = Path('.') / '.env'
 load_dotenv(dotenv_path=env_path)
@@ -11,6 +12,28 @@ class Settings:
     SECRET_KEY: str = os.getenv("SECRET_KEY", "a_very_secret_key_that_should_be_changed")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30 # 30 minutes
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+    VERIFIED_TOKEN_CACHE_SIZE: int = 1024 # Recently verified access tokens kept per process
     UPLOADS_DIR: str = "backend/app/uploads/images" # Relative to project root
 
+    # Multi-worker serving (see gunicorn.conf.py)
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # "memory" keeps caches inside each process; "shared" uses the cache server
+    # so all workers see the same entries and invalidation messages.
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_ADDRESS: str = os.getenv("CACHE_ADDRESS", "/tmp/pottery-cache.sock") # Unix socket path or host:port
+    CACHE_AUTHKEY: str = os.getenv("CACHE_AUTHKEY", SECRET_KEY)
+
+    EVENT_COALESCE_SECONDS: float = float(os.getenv("EVENT_COALESCE_SECONDS", "0.5")) # Like-count events per post are merged within this window
+
+    # Admission control
+    AUTH_RATE_LIMIT_PER_MINUTE: int = int(os.getenv("AUTH_RATE_LIMIT_PER_MINUTE", "10")) # Per client IP
+    WRITE_RATE_LIMIT_PER_MINUTE: int = int(os.getenv("WRITE_RATE_LIMIT_PER_MINUTE", "30")) # Per client IP and per user
+    EXPENSIVE_MAX_CONCURRENCY: int = int(os.getenv("EXPENSIVE_MAX_CONCURRENCY", "8")) # Per worker process
+    MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024))) # 10 MB
+    MAX_IMPORT_BYTES: int = int(os.getenv("MAX_IMPORT_BYTES", str(4 * 1024 * 1024 * 1024))) # 4 GB, for /admin/import
+
+    # Comma-separated emails of users allowed to use the /admin endpoints
+    ADMIN_EMAILS: List[str] = [email.strip() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()]
+
 settings = Settings()
\ No newline at end of file
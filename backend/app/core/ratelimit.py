@@ -0,0 +1,50 @@
+"""Request admission control: per-key rate limits and concurrency caps."""
+import threading
+from typing import Optional
+
+from .cache import get_cache
+
+
+class RateLimit:
+    """Token bucket allowing ``per_minute`` requests per key, with bursts up to ``burst``.
+
+    Bucket state lives in the configured cache backend, so with
+    ``CACHE_BACKEND=shared`` the limit applies across all workers.
+    """
+
+    def __init__(self, scope: str, per_minute: int, burst: Optional[int] = None):
+        self.scope = scope
+        self.rate = per_minute / 60.0
+        self.capacity = burst or per_minute
+
+    def hit(self, key: str) -> float:
+        """Record a request. Returns 0.0 if allowed, else seconds to wait."""
+        return get_cache().take(f"ratelimit:{self.scope}:{key}", self.rate, self.capacity)
+
+
+class ConcurrencyLimiter:
+    """Caps how many requests may run an expensive route at once in this process.
+
+    Requests over the cap are rejected immediately rather than queued, so a
+    burst can't tie up every threadpool worker.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._active >= self.limit:
+                return False
+            self._active += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
@@ -1,5 +1,10 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -27,12 +32,65 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+class VerifiedTokenCache:
+    """LRU of access tokens that already passed signature verification.
+
+    Maps the token string to its subject and expiry, so a client reusing the
+    same token skips ``jwt.decode`` until the token expires.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry[0]
+
+    def put(self, token: str, subject: str, expires_at: float) -> None:
+        with self._lock:
+            self._entries[token] = (subject, expires_at)
+            self._entries.move_to_end(token)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+verified_tokens = VerifiedTokenCache(settings.VERIFIED_TOKEN_CACHE_SIZE)
+
+
 def decode_access_token(token: str) -> Optional[str]:
+    email = verified_tokens.get(token)
+    if email is not None:
+        return email
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: Optional[str] = payload.get("sub")
         if email is None:
             return None
+        if "exp" in payload:
+            verified_tokens.put(token, email, payload["exp"])
         return email
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+
+def create_refresh_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    # Refresh tokens are random and high-entropy, so a fast hash is enough
+    # and lets us look them up by hash instead of running bcrypt.
+    return hashlib.sha256(token.encode()).hexdigest()
\ No newline at end of file
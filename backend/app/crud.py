@@ -1,8 +1,31 @@
+import time
+from datetime import datetime, timedelta, timezone
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from . import models, schemas
-from .core.security import get_password_hash
-from typing import List, Optional
+from sqlalchemy import func, desc, update, insert, select, text, delete
+from . import events, models, schemas
+from .core.cache import get_cache
+from .core.config import settings
+from .core.security import get_password_hash, create_refresh_token, hash_refresh_token
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Feed version: bumped after every write that changes what the post list
+# endpoints return, and used as their ETag. It lives in the cache backend so
+# all workers agree on it when CACHE_BACKEND=shared.
+FEED_VERSION_KEY = "feed:version"
+
+def get_feed_version() -> int:
+    cache = get_cache()
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        # Start from the clock so a restarted cache never reissues a version clients already hold
+        cache.add(FEED_VERSION_KEY, time.time_ns())
+        version = cache.get(FEED_VERSION_KEY)
+    return version
+
+def bump_feed_version() -> int:
+    get_feed_version()
+    return get_cache().incr(FEED_VERSION_KEY)
 
 # User CRUD
 def get_user(db: Session, user_id: int):
@@ -31,46 +54,213 @@ def update_user(db: Session, db_user: models.User, user_in: schemas.UserUpdate)
     if "password" in update_data and update_data["password"]: # Ensure password is not empty string
         hashed_password = get_password_hash(update_data["password"])
         db_user.hashed_password = hashed_password
+        revoke_refresh_tokens_for_user(db, db_user.id, commit=False) # Sign out every session; PUT /users/me gives the caller a new token
     
     db.add(db_user) # Not strictly necessary if db_user is already in session and modified
     db.commit()
     db.refresh(db_user)
+    bump_feed_version() # Posts embed their owner's profile
     return db_user
 
+# Refresh token CRUD
+def _utc_naive(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes, PostgreSQL aware ones
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def create_user_refresh_token(db: Session, owner_id: int) -> str:
+    """Store a new refresh token for the user and return it. Only its hash is kept."""
+    token = create_refresh_token()
+    db_token = models.RefreshToken(
+        token_hash=hash_refresh_token(token),
+        owner_id=owner_id,
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(db_token)
+    # Every login and refresh adds a row, so drop this user's expired ones as we go
+    delete_expired_refresh_tokens(db, owner_id=owner_id, commit=False)
+    db.commit()
+    return token
+
+def delete_expired_refresh_tokens(db: Session, owner_id: Optional[int] = None, commit: bool = True) -> int:
+    """Delete expired refresh tokens, of one user or of everyone. Rotated and
+    revoked rows are kept until then, so replays are still detected."""
+    statement = delete(models.RefreshToken).where(models.RefreshToken.expires_at < datetime.utcnow())
+    if owner_id is not None:
+        statement = statement.where(models.RefreshToken.owner_id == owner_id)
+    result = db.execute(statement)
+    if commit:
+        db.commit()
+    return result.rowcount
+
+def get_refresh_token(db: Session, token: str) -> Optional[models.RefreshToken]:
+    return db.query(models.RefreshToken).filter(models.RefreshToken.token_hash == hash_refresh_token(token)).first()
+
+def revoke_refresh_token(db: Session, db_token: models.RefreshToken) -> bool:
+    """Revoke a token unless it already was. The conditional UPDATE makes this
+    safe against two requests (or workers) rotating the same token at once."""
+    result = db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.id == db_token.id, models.RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def revoke_refresh_tokens_for_user(db: Session, owner_id: int, commit: bool = True):
+    db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.owner_id == owner_id, models.RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    if commit:
+        db.commit()
+
+def rotate_refresh_token(db: Session, token: str) -> Optional[Tuple[models.User, str]]:
+    """Exchange a refresh token for a new one. Returns (user, new_token), or None if
+    the token is unknown, expired or already used."""
+    db_token = get_refresh_token(db, token)
+    if db_token is None or _utc_naive(db_token.expires_at) <= datetime.utcnow():
+        return None
+    if not revoke_refresh_token(db, db_token):
+        # A rotated token was presented again, so it has probably leaked:
+        # revoke every session of this user.
+        revoke_refresh_tokens_for_user(db, db_token.owner_id)
+        return None
+    return db_token.owner, create_user_refresh_token(db, db_token.owner_id)
+
 # Post CRUD
 def create_post(db: Session, post: schemas.PostCreate, owner_id: int, image_filename: Optional[str] = None):
     db_post = models.Post(**post.dict(), owner_id=owner_id, image_filename=image_filename)
     db.add(db_post)
     db.commit()
     db.refresh(db_post)
+    bump_feed_version()
+    events.publish(events.POST_CREATED, jsonable_encoder(schemas.Post.from_orm(db_post)))
     return db_post
 
 def get_post(db: Session, post_id: int):
-    return db.query(models.Post).filter(models.Post.id == post_id).first()
+    return db.query(models.Post).filter(models.Post.id == post_id, models.Post.deleted_at.is_(None)).first()
+
+def update_post(db: Session, db_post: models.Post, post_in: schemas.PostUpdate) -> models.Post:
+    db_post.title = post_in.title
+    db_post.text_content = post_in.text_content
+    db.commit()
+    db.refresh(db_post)
+    bump_feed_version()
+    events.publish(events.POST_UPDATED, jsonable_encoder(enrich_post_with_like_count(db, db_post)))
+    return db_post
+
+def soft_delete_post(db: Session, db_post: models.Post):
+    """Hide a post from every query right away. Its likes, comments and image
+    are removed later by reaper.reap_deleted_posts."""
+    db_post.deleted_at = datetime.utcnow()
+    db.commit()
+    bump_feed_version()
+    events.publish(events.POST_DELETED, {"post_id": db_post.id})
+
+# List views select only the columns schemas.Post needs into slotted row
+# objects, instead of hydrating Post and User entities (with password hashes)
+# per row. A page's owners come from one query and are built once each as
+# schemas.User, which response validation passes through as is, so all posts
+# of an owner share one object. Like counts come from one grouped query.
+class PostListItem:
+    __slots__ = ("id", "title", "text_content", "image_filename", "owner_id", "created_at", "updated_at", "owner", "like_count")
 
-def get_posts(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Post).order_by(desc(models.Post.created_at)).offset(skip).limit(limit).all()
+    def __init__(self, row, owner: schemas.User, like_count: int):
+        self.id = row.id
+        self.title = row.title
+        self.text_content = row.text_content
+        self.image_filename = row.image_filename
+        self.owner_id = row.owner_id
+        self.created_at = row.created_at
+        self.updated_at = row.updated_at
+        self.owner = owner
+        self.like_count = like_count
 
-def get_posts_for_homepage(db: Session, limit: int = 10, min_likes_for_rated: int = 5):
+def _post_list_query(db: Session, preview_chars: Optional[int] = None, *extra_columns):
+    text_content = models.Post.text_content
+    if preview_chars is not None:
+        text_content = func.substr(models.Post.text_content, 1, preview_chars)
+    return (
+        db.query(
+            models.Post.id,
+            models.Post.title,
+            text_content.label("text_content"),
+            models.Post.image_filename,
+            models.Post.owner_id,
+            models.Post.created_at,
+            models.Post.updated_at,
+            *extra_columns,
+        )
+        .filter(models.Post.deleted_at.is_(None))
+    )
+
+def get_like_counts_for_posts(db: Session, post_ids: List[int]) -> Dict[int, int]:
+    if not post_ids:
+        return {}
+    rows = (
+        db.query(models.Like.post_id, func.count(models.Like.id))
+        .filter(models.Like.post_id.in_(post_ids))
+        .group_by(models.Like.post_id)
+        .all()
+    )
+    return dict(rows)
+
+def get_post_owners(db: Session, owner_ids: List[int]) -> Dict[int, schemas.User]:
+    if not owner_ids:
+        return {}
+    rows = (
+        db.query(models.User.id, models.User.email, models.User.username, models.User.bio, models.User.created_at)
+        .filter(models.User.id.in_(set(owner_ids)))
+        .all()
+    )
+    return {row.id: schemas.User.from_orm(row) for row in rows}
+
+def _to_list_items(db: Session, rows, like_counts: Optional[Dict[int, int]] = None) -> List[PostListItem]:
+    if like_counts is None:
+        like_counts = get_like_counts_for_posts(db, [row.id for row in rows])
+    owners = get_post_owners(db, [row.owner_id for row in rows])
+    return [PostListItem(row, owners[row.owner_id], like_counts.get(row.id, 0)) for row in rows]
+
+def get_posts(db: Session, skip: int = 0, limit: int = 10, preview_chars: Optional[int] = None) -> List[PostListItem]:
+    """Newest posts. ``preview_chars`` truncates text_content in the query."""
+    rows = (
+        _post_list_query(db, preview_chars)
+        .order_by(desc(models.Post.created_at))
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    return _to_list_items(db, rows)
+
+def get_posts_for_homepage(db: Session, limit: int = 10, min_likes_for_rated: int = 5, preview_chars: Optional[int] = None) -> List[PostListItem]:
     # Count posts with at least one like
-    rated_posts_count = db.query(models.Post).join(models.Like).group_by(models.Post.id).having(func.count(models.Like.id) > 0).count()
+    rated_posts_count = (
+        db.query(func.count(func.distinct(models.Like.post_id)))
+        .join(models.Post, models.Post.id == models.Like.post_id)
+        .filter(models.Post.deleted_at.is_(None))
+        .scalar()
+    )
 
     if rated_posts_count >= min_likes_for_rated:
         # Select top-rated posts (by like count)
-        return (
-            db.query(models.Post, func.count(models.Like.id).label("like_count"))
+        like_count = func.count(models.Like.id).label("like_count")
+        rows = (
+            _post_list_query(db, preview_chars, like_count)
             .outerjoin(models.Like, models.Post.id == models.Like.post_id)
             .group_by(models.Post.id)
             .order_by(desc("like_count"), desc(models.Post.created_at))
             .limit(limit)
             .all()
         )
+        return _to_list_items(db, rows, {row.id: row.like_count for row in rows})
     else:
         # Select randomly (SQLite specific)
         # For other DBs, random might be different, e.g., PostgreSQL uses RANDOM()
-        posts = db.query(models.Post).order_by(func.random()).limit(limit).all()
-        # Attach a like_count of 0 for consistency if needed by schema, or handle in schema/router
-        return [(post, 0) for post in posts] # (post, like_count)
+        rows = _post_list_query(db, preview_chars).order_by(func.random()).limit(limit).all()
+        return _to_list_items(db, rows)
 
 
 # Comment CRUD
@@ -98,6 +288,7 @@ def create_like(db: Session, owner_id: int, post_id: int):
     db.add(db_like)
     db.commit()
     db.refresh(db_like)
+    _publish_like_count(db, post_id, bump_feed_version())
     return db_like
 
 def delete_like(db: Session, owner_id: int, post_id: int):
@@ -105,14 +296,127 @@ def delete_like(db: Session, owner_id: int, post_id: int):
     if db_like:
         db.delete(db_like)
         db.commit()
+        _publish_like_count(db, post_id, bump_feed_version())
         return True
     return False
 
 def get_like_count_for_post(db: Session, post_id: int) -> int:
     return db.query(func.count(models.Like.id)).filter(models.Like.post_id == post_id).scalar() or 0
 
+def _publish_like_count(db: Session, post_id: int, version: int):
+    # Counted after the commit and the version bump, so the event with the
+    # highest version always carries the latest count, whatever order
+    # concurrent requests' events arrive in
+    like_count = get_like_count_for_post(db, post_id)
+    events.publish(events.LIKE_COUNT_CHANGED, {"post_id": post_id, "like_count": like_count, "version": version})
+
 def enrich_post_with_like_count(db: Session, post: models.Post) -> schemas.Post:
     like_count = get_like_count_for_post(db, post.id)
     post_data = schemas.Post.from_orm(post)
     post_data.like_count = like_count
-    return post_data
\ No newline at end of file
+    return post_data
+
+# Bulk export/import helpers (see bulk.py). These work on plain row mappings
+# and Core statements rather than ORM entities, so large tables stream in
+# fixed-size batches.
+def begin_snapshot(db: Session):
+    """Make the session's following reads see one consistent snapshot of the
+    database, until it commits or rolls back. Call on a fresh session."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        # pysqlite only opens a transaction before writes, so every read would
+        # otherwise see the latest data; in WAL mode this doesn't block writers
+        db.execute(text("BEGIN"))
+    elif dialect == "postgresql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+def iter_table_batches(db: Session, model, batch_size: int = 1000) -> Iterator[Sequence[Any]]:
+    """Yield all rows of ``model``'s table in id order, ``batch_size`` rows at a time."""
+    table = model.__table__
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(table).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]["id"]
+
+def get_rows_for_posts(db: Session, model, post_ids: List[int]) -> Sequence[Any]:
+    """Rows of ``model`` (Like or Comment) belonging to any of ``post_ids``."""
+    table = model.__table__
+    return db.execute(select(table).where(table.c.post_id.in_(post_ids)).order_by(table.c.id)).mappings().all()
+
+def get_user_identity_maps(db: Session) -> Tuple[Dict[str, int], set]:
+    """Existing users as ({email: id}, {usernames}), for matching imported users."""
+    rows = db.query(models.User.id, models.User.email, models.User.username).all()
+    return {row.email: row.id for row in rows}, {row.username for row in rows}
+
+def _group_by_columns(rows: List[Dict[str, Any]]) -> Dict[Tuple[str, ...], List[int]]:
+    # An executemany needs the same columns in every row. Rows that leave a
+    # column out (to get its server default) go in a separate statement.
+    groups: Dict[Tuple[str, ...], List[int]] = {}
+    for index, row in enumerate(rows):
+        groups.setdefault(tuple(sorted(row)), []).append(index)
+    return groups
+
+def bulk_insert(db: Session, model, rows: List[Dict[str, Any]]):
+    """Insert many rows with one executemany/multi-row INSERT per set of
+    columns present. Does not commit."""
+    for indexes in _group_by_columns(rows).values():
+        db.execute(insert(model.__table__), [rows[index] for index in indexes])
+
+def bulk_insert_returning_ids(db: Session, model, rows: List[Dict[str, Any]]) -> List[int]:
+    """Like bulk_insert, but the database assigns the ids and they are returned
+    in the order of ``rows``. Needs RETURNING (PostgreSQL, SQLite 3.35+)."""
+    table = model.__table__
+    ids: List[int] = [0] * len(rows)
+    for indexes in _group_by_columns(rows).values():
+        result = db.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True),
+            [rows[index] for index in indexes],
+        )
+        for index, new_id in zip(indexes, result.scalars()):
+            ids[index] = new_id
+    return ids
+
+# Soft-deleted post cleanup (see reaper.py). Each step is idempotent, so an
+# interrupted run is simply finished by the next one.
+def get_deleted_post_ids(db: Session, after_id: int = 0, limit: int = 1000) -> List[int]:
+    rows = (
+        db.query(models.Post.id)
+        .filter(models.Post.deleted_at.isnot(None), models.Post.id > after_id)
+        .order_by(models.Post.id)
+        .limit(limit)
+        .all()
+    )
+    return [row.id for row in rows]
+
+def purge_post_children(db: Session, post_ids: List[int]) -> Tuple[int, int]:
+    """Remove likes and comments of ``post_ids`` with one bulk DELETE each,
+    without loading them into the session. Returns (likes, comments) removed."""
+    likes = db.execute(delete(models.Like).where(models.Like.post_id.in_(post_ids))).rowcount
+    comments = db.execute(delete(models.Comment).where(models.Comment.post_id.in_(post_ids))).rowcount
+    db.commit()
+    return likes, comments
+
+def detach_post_images(db: Session, post_ids: List[int]) -> List[str]:
+    """Clear image_filename on ``post_ids`` and return the files that no live
+    post references any more, i.e. the ones safe to delete."""
+    filenames = {
+        row.image_filename
+        for row in db.query(models.Post.image_filename)
+        .filter(models.Post.id.in_(post_ids), models.Post.image_filename.isnot(None))
+    }
+    if not filenames:
+        return []
+    db.execute(update(models.Post).where(models.Post.id.in_(post_ids)).values(image_filename=None))
+    db.commit()
+    # Imported copies of a post can share an image file
+    still_used = {
+        row.image_filename
+        for row in db.query(models.Post.image_filename)
+        .filter(models.Post.image_filename.in_(filenames))
+    }
+    return sorted(filenames - still_used)
@@ -1,10 +1,14 @@
-from fastapi import Depends, HTTPException, status
+import math
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from sqlalchemy.orm import Session
 
 from . import crud, models, schemas
 from .core import security
+from .core.config import settings
+from .core.ratelimit import ConcurrencyLimiter, RateLimit
 from .db.database import get_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login") # tokenUrl should match your login endpoint
@@ -23,4 +27,57 @@ async def get_current_user(
     user = crud.get_user_by_email(db, email=email)
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    return user
+
+
+async def get_current_admin_user(current_user: models.User = Depends(get_current_user)) -> models.User:
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+
+def _too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests",
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
+
+def limit_by_ip(scope: str, per_minute: int):
+    """Dependency rejecting with 429 once a client IP exceeds ``per_minute`` requests."""
+    limit = RateLimit(f"{scope}:ip", per_minute)
+
+    def dependency(request: Request):
+        client_ip = request.client.host if request.client else "unknown"
+        retry_after = limit.hit(client_ip)
+        if retry_after:
+            raise _too_many_requests(retry_after)
+    return dependency
+
+def limit_by_user(scope: str, per_minute: int):
+    """Dependency rejecting with 429 once the current user exceeds ``per_minute`` requests."""
+    limit = RateLimit(f"{scope}:user", per_minute)
+
+    def dependency(current_user: models.User = Depends(get_current_user)):
+        retry_after = limit.hit(str(current_user.id))
+        if retry_after:
+            raise _too_many_requests(retry_after)
+    return dependency
+
+# Shared by the routes that burn CPU (bcrypt) or disk (uploads)
+expensive_routes = ConcurrencyLimiter(settings.EXPENSIVE_MAX_CONCURRENCY)
+
+def limit_concurrency(limiter: ConcurrencyLimiter = expensive_routes):
+    """Dependency shedding load with 503 while ``limiter`` is at capacity."""
+    def dependency():
+        if not limiter.try_acquire():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            yield
+        finally:
+            limiter.release()
+    return dependency
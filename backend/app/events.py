@@ -0,0 +1,114 @@
+"""Server-sent events for post changes and like-count changes.
+
+crud publishes events on the cache backend's bus, so with CACHE_BACKEND=shared
+every worker hears about writes made by any worker. Each worker's
+``broadcaster`` then fans them out to its own connected SSE clients.
+Like-count changes are coalesced per post: a burst of likes within
+``EVENT_COALESCE_SECONDS`` is sent as one event carrying the latest count.
+Each like event carries the feed version of its write; events older than
+one already queued or recently sent for the same post are dropped, since
+concurrent requests can publish out of order.
+"""
+import asyncio
+import json
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .core.cache import get_bus
+from .core.config import settings
+
+CHANNEL = "events"
+KEEPALIVE_SECONDS = 15.0
+SENT_VERSION_TTL_SECONDS = 60.0 # How long a sent like version is remembered to reject late stale events
+
+POST_CREATED = "post_created"
+POST_UPDATED = "post_updated"
+POST_DELETED = "post_deleted"
+LIKE_COUNT_CHANGED = "like_count_changed"
+RESYNC = "resync" # Sent to a client that fell behind; it should refetch
+
+
+def publish(event_type: str, data: Dict[str, Any]):
+    get_bus().publish(CHANNEL, {"type": event_type, "data": data})
+
+
+def format_sse(message: Dict[str, Any]) -> str:
+    return f"event: {message['type']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+class EventBroadcaster:
+    """Fans bus messages out to per-client asyncio queues on the worker's event loop."""
+
+    def __init__(self, bus=None, coalesce_seconds: Optional[float] = None, queue_size: int = 100):
+        self._bus = bus
+        self.coalesce_seconds = settings.EVENT_COALESCE_SECONDS if coalesce_seconds is None else coalesce_seconds
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._sent_versions: Dict[int, Tuple[int, float]] = {} # post_id -> (version, loop time sent)
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._attached = False
+
+    def listen(self) -> asyncio.Queue:
+        """Register a client. Must be called from the event loop serving it."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending.clear()
+            self._sent_versions.clear()
+            self._flush_handle = None
+        if not self._attached:
+            (self._bus or get_bus()).subscribe(CHANNEL, self._on_message)
+            self._attached = True
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unlisten(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def _on_message(self, message: Dict[str, Any]):
+        # Called from whichever thread published (or the bus listener thread)
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message: Dict[str, Any]):
+        if message["type"] != LIKE_COUNT_CHANGED:
+            self._send(message)
+            return
+        post_id, version = message["data"]["post_id"], message["data"]["version"]
+        pending = self._pending.get(post_id)
+        if pending is not None and pending["data"]["version"] >= version:
+            return
+        sent = self._sent_versions.get(post_id)
+        if sent is not None and sent[0] >= version:
+            return
+        self._pending[post_id] = message
+        if self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.coalesce_seconds, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        pending = list(self._pending.values())
+        self._pending.clear()
+        now = self._loop.time()
+        for post_id, (_, sent_at) in list(self._sent_versions.items()):
+            if now - sent_at > SENT_VERSION_TTL_SECONDS:
+                del self._sent_versions[post_id]
+        for message in pending:
+            self._sent_versions[message["data"]["post_id"]] = (message["data"]["version"], now)
+            self._send(message)
+
+    def _send(self, message: Dict[str, Any]):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and tell it to refetch instead
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": RESYNC, "data": {}})
+
+
+broadcaster = EventBroadcaster()
@@ -1,10 +1,13 @@
+import threading
+
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
 from .db import database
-from . import models
-from .routers import auth, posts, users # Assuming you create users.py router
+from . import crud, models, reaper
+from .routers import admin, auth, posts, users # Assuming you create users.py router
+from .core.bodylimit import BodySizeLimitMiddleware
 from .core.config import settings
 from pathlib import Path
 
@@ -14,6 +17,13 @@ models.Base.metadata.create_all(bind=database.engine) # Create database tables
 
 app = FastAPI(title=settings.PROJECT_NAME)
 
+# Reject oversized request bodies while they are received, before FastAPI
+# parses them (and spools uploads to disk) and before any rate limit runs.
+# Added before CORSMiddleware so CORS wraps it and its 413 carries CORS headers.
+MAX_BODY_BYTES = settings.MAX_UPLOAD_BYTES + 64 * 1024 # Leave room for the other form fields
+MAX_BODY_BYTES_BY_PATH = {"/admin/import": settings.MAX_IMPORT_BYTES}
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_BODY_BYTES, max_bytes_by_path=MAX_BODY_BYTES_BY_PATH)
+
 # CORS (Cross-Origin Resource Sharing)
 # Adjust origins as needed for your frontend development and production URLs
 app.add_middleware(
@@ -24,9 +34,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _startup_cleanup():
+    # Posts deleted right before a restart may still have likes, comments or images
+    reaper.reap_deleted_posts()
+    # Tokens of users who stopped logging in are not removed by their own refreshes
+    db = database.SessionLocal()
+    try:
+        crud.delete_expired_refresh_tokens(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def finish_interrupted_cleanup():
+    threading.Thread(target=_startup_cleanup, name="startup-cleanup", daemon=True).start()
+
 app.include_router(auth.router)
 app.include_router(posts.router)
 app.include_router(users.router)
+app.include_router(admin.router)
 
 # Serve uploaded images statically
 # The path "/uploads/images" will serve files from the "backend/app/uploads/images" directory
@@ -41,7 +66,10 @@ frontend_build_dir = Path(__file__).resolve().parent.parent.parent / "frontend"
 
 # Mount static assets (js, css, media) from the build directory
 # This needs to be specific enough not to catch the root path for index.html yet
-app.mount("/static", StaticFiles(directory=frontend_build_dir / "static"), name="static_frontend_assets")
+# Skipped when the frontend has not been built (e.g. when running the backend tests);
+# the routes below then answer with a 404 explaining how to build it.
+if (frontend_build_dir / "static").is_dir():
+    app.mount("/static", StaticFiles(directory=frontend_build_dir / "static"), name="static_frontend_assets")
 
 @app.get("/")
 async def serve_spa_root():
@@ -19,6 +19,7 @@ class User(Base):
     posts = relationship("Post", back_populates="owner")
     comments = relationship("Comment", back_populates="owner")
     likes = relationship("Like", back_populates="owner")
+    refresh_tokens = relationship("RefreshToken", back_populates="owner")
 
 class Post(Base):
     __tablename__ = "posts"
@@ -30,6 +31,7 @@ class Post(Base):
     owner_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True, index=True) # Soft delete; see reaper.py
 
     owner = relationship("User", back_populates="posts")
     comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
@@ -41,7 +43,7 @@ class Comment(Base):
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
     owner_id = Column(Integer, ForeignKey("users.id"))
-    post_id = Column(Integer, ForeignKey("posts.id"))
+    post_id = Column(Integer, ForeignKey("posts.id"), index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     owner = relationship("User", back_populates="comments")
@@ -52,10 +54,22 @@ class Like(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
-    post_id = Column(Integer, ForeignKey("posts.id"))
+    post_id = Column(Integer, ForeignKey("posts.id"), index=True) # Like counts are looked up by post
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     owner = relationship("User", back_populates="likes")
     post = relationship("Post", back_populates="likes")
 
-    __table_args__ = (UniqueConstraint('owner_id', 'post_id', name='_user_post_uc'),)
\ No newline at end of file
+    __table_args__ = (UniqueConstraint('owner_id', 'post_id', name='_user_post_uc'),)
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String, unique=True, index=True, nullable=False) # SHA-256 of the token, never the token itself
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True) # Set on rotation or logout
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    owner = relationship("User", back_populates="refresh_tokens")
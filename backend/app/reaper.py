@@ -0,0 +1,70 @@
+"""Background cleanup of soft-deleted posts.
+
+Deleting a post only sets ``deleted_at``; this removes its likes and comments
+with bulk DELETE statements and deletes image files no live post uses. It
+runs after each delete request, once at startup to finish work interrupted by
+a restart, and on demand with ``python -m app.reaper``.
+"""
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from . import crud
+from .core.config import settings
+from .db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def purge_posts(db: Session, post_ids: List[int], uploads_dir: Optional[Path] = None) -> Dict[str, int]:
+    uploads_dir = Path(uploads_dir or settings.UPLOADS_DIR)
+    likes, comments = crud.purge_post_children(db, post_ids)
+    images = 0
+    for filename in crud.detach_post_images(db, post_ids):
+        path = uploads_dir / Path(filename).name
+        try:
+            path.unlink()
+            images += 1
+        except FileNotFoundError:
+            pass
+    return {"likes": likes, "comments": comments, "images": images}
+
+
+def reap_post(post_id: int):
+    """Clean up one deleted post. Meant for FastAPI BackgroundTasks, so it opens its own session."""
+    db = SessionLocal()
+    try:
+        purge_posts(db, [post_id])
+    except Exception:
+        # The startup sweep retries anything left behind
+        logger.exception("Cleanup of deleted post %s failed", post_id)
+    finally:
+        db.close()
+
+
+def reap_deleted_posts(uploads_dir: Optional[Path] = None) -> Dict[str, int]:
+    """Clean up every soft-deleted post, in batches. Safe to run repeatedly."""
+    totals = {"posts": 0, "likes": 0, "comments": 0, "images": 0}
+    db = SessionLocal()
+    try:
+        last_id = 0
+        while True:
+            post_ids = crud.get_deleted_post_ids(db, after_id=last_id, limit=BATCH_SIZE)
+            if not post_ids:
+                break
+            counts = purge_posts(db, post_ids, uploads_dir)
+            totals["posts"] += len(post_ids)
+            for kind, count in counts.items():
+                totals[kind] += count
+            last_id = post_ids[-1]
+    finally:
+        db.close()
+    return totals
+
+
+if __name__ == "__main__":
+    print(reap_deleted_posts())
@@ -0,0 +1,50 @@
+import tarfile
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .. import bulk
+from ..db.database import SessionLocal, get_db
+from ..dependencies import get_current_admin_user, limit_concurrency
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(get_current_admin_user)],
+)
+
+def _stream_export():
+    # The response body is produced after the request's dependencies are torn
+    # down, so the export uses its own session.
+    db = SessionLocal()
+    try:
+        yield from bulk.export_archive(db)
+    finally:
+        db.close()
+
+@router.get("/export", dependencies=[Depends(limit_concurrency())])
+def export_data():
+    """
+    Download all users, posts (with likes and comments) and images as a tar archive.
+    """
+    return StreamingResponse(
+        _stream_export(),
+        media_type="application/x-tar",
+        headers={"Content-Disposition": 'attachment; filename="pottery-export.tar"'},
+    )
+
+@router.post("/import", dependencies=[Depends(limit_concurrency())])
+def import_data(archive: UploadFile = File(...), db: Session = Depends(get_db)):
+    """
+    Load an archive produced by /admin/export. Returns how many rows and images were added.
+    The import is all-or-nothing: on any error nothing is added, so it is safe to retry.
+    """
+    try:
+        return bulk.import_archive(db, archive.file)
+    except (tarfile.TarError, ValueError, KeyError, SQLAlchemyError) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid archive: {e}")
+    finally:
+        archive.file.close()
@@ -4,14 +4,22 @@ from sqlalchemy.orm import Session
 
 from .. import crud, schemas
 from ..core import security
+from ..core.config import settings
 from ..db.database import get_db
+from ..dependencies import limit_by_ip, limit_concurrency
 
 router = APIRouter(
     prefix="/auth",
     tags=["auth"],
 )
 
-@router.post("/register", response_model=schemas.User)
+# Both routes run bcrypt, so throttle them per client and cap how many run at once
+auth_admission = [
+    Depends(limit_by_ip("auth", settings.AUTH_RATE_LIMIT_PER_MINUTE)),
+    Depends(limit_concurrency()),
+]
+
+@router.post("/register", response_model=schemas.User, dependencies=auth_admission)
 def register_user(
     db: Session = Depends(get_db),
     email: str = Form(...),
@@ -26,8 +34,9 @@ def register_user(
         raise HTTPException(status_code=400, detail="Email already registered")
     return crud.create_user(db=db, user=user_create)
 
-@router.post("/login", response_model=schemas.Token)
-async def login_for_access_token(
+# Plain def so bcrypt runs in the threadpool instead of blocking the event loop
+@router.post("/login", response_model=schemas.Token, dependencies=auth_admission)
+def login_for_access_token(
     db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ):
     user = crud.get_user_by_email(db, email=form_data.username) # OAuth2 form uses 'username' for email
@@ -40,7 +49,39 @@ async def login_for_access_token(
     access_token = security.create_access_token(
         data={"sub": user.email}
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token = crud.create_user_refresh_token(db, owner_id=user.id)
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+@router.post(
+    "/refresh",
+    response_model=schemas.Token,
+    dependencies=[Depends(limit_by_ip("auth-refresh", settings.AUTH_RATE_LIMIT_PER_MINUTE))],
+)
+def refresh_access_token(body: schemas.RefreshTokenRequest, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token, without re-checking the password.
+    The refresh token is rotated: the old one stops working and a new one is returned.
+    """
+    rotated = crud.rotate_refresh_token(db, body.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user, refresh_token = rotated
+    access_token = security.create_access_token(data={"sub": user.email})
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(body: schemas.RefreshTokenRequest, db: Session = Depends(get_db)):
+    """
+    Revoke a refresh token. Access tokens stay valid until they expire.
+    """
+    db_token = crud.get_refresh_token(db, body.refresh_token)
+    if db_token is not None:
+        crud.revoke_refresh_token(db, db_token)
+    return None
 
 # To make this upgradable for social sign-in:
 # You would add new User model fields (e.g., provider, social_id).
@@ -1,14 +1,15 @@
-import shutil
+import asyncio
 import uuid
 from pathlib import Path
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Query, status, Request, Response
+from fastapi.responses import StreamingResponse
 
 from sqlalchemy.orm import Session
 
-from .. import crud, models, schemas
-from ..dependencies import get_current_user
+from .. import crud, events, models, reaper, schemas
+from ..dependencies import get_current_user, limit_by_ip, limit_by_user, limit_concurrency
 from ..db.database import get_db
 from ..core.config import settings
 
@@ -20,7 +21,42 @@ router = APIRouter(
 UPLOADS_DIR = Path(settings.UPLOADS_DIR)
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True) # Ensure directory exists
 
-@router.post("/", response_model=schemas.Post)
+write_rate_limits = [
+    Depends(limit_by_ip("posts-write", settings.WRITE_RATE_LIMIT_PER_MINUTE)),
+    Depends(limit_by_user("posts-write", settings.WRITE_RATE_LIMIT_PER_MINUTE)),
+]
+
+def _feed_etag() -> str:
+    return f'W/"{crud.get_feed_version()}"'
+
+def _client_has_current(request: Request, etag: str) -> bool:
+    """Weak If-None-Match comparison against the current feed ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag[2:] in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+def _set_feed_headers(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache" # Always revalidate, but allow reuse on 304
+
+def _save_upload(upload: UploadFile, destination: Path, max_bytes: int) -> None:
+    """Copy an upload to disk, aborting with 413 (and no file left behind) past ``max_bytes``."""
+    written = 0
+    with destination.open("wb") as buffer:
+        for chunk in iter(lambda: upload.file.read(1024 * 1024), b""):
+            written += len(chunk)
+            if written > max_bytes:
+                buffer.close()
+                destination.unlink()
+                raise HTTPException(status_code=413, detail="Uploaded image is too large.")
+            buffer.write(chunk)
+
+# FastAPI reads the whole multipart body before running dependencies, so the
+# rate limits and the concurrency cap only apply once the upload is received.
+# Its size is capped while it arrives by BodySizeLimitMiddleware (see main.py).
+@router.post("/", response_model=schemas.Post, dependencies=[*write_rate_limits, Depends(limit_concurrency())])
 async def create_new_post(
     request: Request, # Add request parameter
     title: str = Form(...),
@@ -45,9 +81,10 @@ async def create_new_post(
         image_path = UPLOADS_DIR / unique_filename
 
         try:
-            with image_path.open("wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
+            _save_upload(image, image_path, settings.MAX_UPLOAD_BYTES)
             image_filename_on_disk = unique_filename # Store only the filename or relative path
+        except HTTPException:
+            raise
         except Exception as e:
             # Log error e
             raise HTTPException(status_code=500, detail=f"Could not save image: {e}")
@@ -59,26 +96,62 @@ async def create_new_post(
     return crud.enrich_post_with_like_count(db, db_post)
 
 
+# The feed routes read the ETag before querying, so a write racing the query
+# can only make the next request re-fetch, never serve stale data with a 304.
 @router.get("/", response_model=List[schemas.Post])
-def read_posts(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    posts = crud.get_posts(db, skip=skip, limit=limit)
-    return [crud.enrich_post_with_like_count(db, post) for post in posts]
+def read_posts(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    preview_chars: Optional[int] = Query(None, ge=1, description="Truncate text_content to this many characters"),
+    db: Session = Depends(get_db),
+):
+    etag = _feed_etag()
+    if _client_has_current(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    _set_feed_headers(response, etag)
+    return crud.get_posts(db, skip=skip, limit=limit, preview_chars=preview_chars)
 
 @router.get("/homepage", response_model=List[schemas.Post])
-def read_homepage_posts(limit: int = 10, db: Session = Depends(get_db)):
-    # The crud.get_posts_for_homepage returns (post, like_count) tuples
-    # We need to map this to schemas.Post
-    results = crud.get_posts_for_homepage(db, limit=limit)
-    enriched_posts = []
-    for item in results:
-        if isinstance(item, tuple) and len(item) == 2 and isinstance(item[0], models.Post):
-            post_model, like_count = item
-            post_schema = schemas.Post.from_orm(post_model)
-            post_schema.like_count = like_count
-            enriched_posts.append(post_schema)
-        elif isinstance(item, models.Post): # Fallback if only post is returned
-            enriched_posts.append(crud.enrich_post_with_like_count(db, item))
-    return enriched_posts
+def read_homepage_posts(
+    request: Request,
+    response: Response,
+    limit: int = 10,
+    preview_chars: Optional[int] = Query(None, ge=1, description="Truncate text_content to this many characters"),
+    db: Session = Depends(get_db),
+):
+    etag = _feed_etag()
+    if _client_has_current(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    _set_feed_headers(response, etag)
+    return crud.get_posts_for_homepage(db, limit=limit, preview_chars=preview_chars)
+
+@router.get("/events")
+async def stream_events():
+    """
+    Server-sent events: `post_created` and `post_updated` with the post,
+    `post_deleted` with `post_id`, `like_count_changed` with `post_id` and
+    `like_count`, and `resync` when the client fell behind and should refetch.
+    """
+    async def event_stream():
+        queue = events.broadcaster.listen()
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=events.KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield events.format_sse(message)
+        finally:
+            events.broadcaster.unlisten(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/{post_id}", response_model=schemas.Post)
 def read_post(post_id: int, db: Session = Depends(get_db)):
@@ -87,7 +160,39 @@ def read_post(post_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Post not found")
     return crud.enrich_post_with_like_count(db, db_post)
 
-@router.post("/{post_id}/like", response_model=schemas.Like)
+def _get_own_post(db: Session, post_id: int, current_user: models.User) -> models.Post:
+    db_post = crud.get_post(db, post_id=post_id)
+    if db_post is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    if db_post.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not allowed to modify this post")
+    return db_post
+
+@router.put("/{post_id}", response_model=schemas.Post, dependencies=write_rate_limits)
+def update_post(
+    post_id: int,
+    post_update: schemas.PostUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    db_post = _get_own_post(db, post_id, current_user)
+    db_post = crud.update_post(db=db, db_post=db_post, post_in=post_update)
+    return crud.enrich_post_with_like_count(db, db_post)
+
+@router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=write_rate_limits)
+def delete_post(
+    post_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    db_post = _get_own_post(db, post_id, current_user)
+    crud.soft_delete_post(db=db, db_post=db_post)
+    # Likes, comments and the image go after the response is sent
+    background_tasks.add_task(reaper.reap_post, post_id)
+    return None
+
+@router.post("/{post_id}/like", response_model=schemas.Like, dependencies=write_rate_limits)
 def like_post(
     post_id: int,
     db: Session = Depends(get_db),
@@ -103,7 +208,7 @@ def like_post(
 
     return crud.create_like(db=db, owner_id=current_user.id, post_id=post_id)
 
-@router.delete("/{post_id}/like", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{post_id}/like", status_code=status.HTTP_204_NO_CONTENT, dependencies=write_rate_limits)
 def unlike_post(
     post_id: int,
     db: Session = Depends(get_db),
@@ -117,5 +222,4 @@ def unlike_post(
         raise HTTPException(status_code=404, detail="Like not found or user did not like this post")
     return None # FastAPI will return 204 No Content
 
-# Add similar endpoints for comments: POST /{post_id}/comments, GET /{post_id}/comments, DELETE /comments/{comment_id}
-# Add PUT and DELETE for posts, ensuring ownership.
\ No newline at end of file
+# Add similar endpoints for comments: POST /{post_id}/comments, GET /{post_id}/comments, DELETE /comments/{comment_id}
\ No newline at end of file
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from .. import crud, models, schemas
-from ..dependencies import get_current_user
+from ..core.config import settings
+from ..dependencies import get_current_user, limit_by_user, limit_concurrency
 from ..db.database import get_db
 
 router = APIRouter(
@@ -18,17 +19,27 @@ async def read_users_me(current_user: models.User = Depends(get_current_user)):
     """
     return current_user
 
-@router.put("/me", response_model=schemas.User)
-async def update_user_me(
+@router.put(
+    "/me",
+    response_model=schemas.UserUpdateResult,
+    # Password changes run bcrypt
+    dependencies=[Depends(limit_by_user("users-write", settings.WRITE_RATE_LIMIT_PER_MINUTE)), Depends(limit_concurrency())],
+)
+# Plain def so bcrypt and the database work run in the threadpool instead of blocking the event loop
+def update_user_me(
     user_update: schemas.UserUpdate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """
-    Update current logged-in user.
+    Update current logged-in user. Changing the password signs out every session,
+    so the response then carries a new refresh token for the caller.
     """
     updated_user = crud.update_user(db=db, db_user=current_user, user_in=user_update)
-    return updated_user
+    result = schemas.UserUpdateResult.from_orm(updated_user)
+    if user_update.password:
+        result.refresh_token = crud.create_user_refresh_token(db, owner_id=updated_user.id)
+    return result
 
 @router.get("/{user_id}", response_model=schemas.User)
 def read_user(user_id: int, db: Session = Depends(get_db)):
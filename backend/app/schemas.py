@@ -24,6 +24,10 @@ class UserUpdate(BaseModel):
     password: Optional[str] = None
     bio: Optional[str] = None
 
+class UserUpdateResult(User):
+    # Set after a password change, which revokes every earlier refresh token
+    refresh_token: Optional[str] = None
+
 # Post Schemas
 class PostBase(BaseModel):
     title: str
@@ -83,6 +87,10 @@ class Like(LikeBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     email: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,41 @@
+import io
+import tarfile
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.config import settings
+from app.tests.api.test_posts_api import get_auth_headers
+
+# Assumes the TestClient (client) and Session (db) fixtures from conftest.py.
+
+def make_archive(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+def test_import_requires_admin(client: TestClient, db: Session) -> None:
+    auth_headers = get_auth_headers(client, db, username="notadmin", email="notadmin@example.com")
+    response = client.post("/admin/import", headers=auth_headers, files={"archive": ("a.tar", make_archive({}))})
+    assert response.status_code == 403
+
+def test_failed_import_returns_400_and_adds_nothing(client: TestClient, db: Session, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["admin@example.com"])
+    auth_headers = get_auth_headers(client, db, username="admin", email="admin@example.com")
+    archive = make_archive({
+        "users/000000.ndjson": b'{"id": 1, "email": "importee@example.com", "username": "importee", "hashed_password": "x"}\n',
+        "posts/000000.ndjson": b'{"id": 1, "owner_id": 1, "title": "Fine"}\n',
+        # The same like twice violates the unique constraint
+        "posts/000001.ndjson": b'{"id": 2, "owner_id": 1, "title": "Bad", "likes": [{"owner_id": 1}, {"owner_id": 1}]}\n',
+    })
+
+    response = client.post("/admin/import", headers=auth_headers, files={"archive": ("a.tar", archive)})
+    assert response.status_code == 400
+    db.expire_all()
+    assert db.query(models.User).filter(models.User.email == "importee@example.com").count() == 0
+    assert db.query(models.Post).count() == 0
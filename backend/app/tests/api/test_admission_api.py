@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.dependencies import expensive_routes
+from app.tests.api.test_posts_api import get_auth_headers
+
+# Assumes the TestClient (client) and Session (db) fixtures from conftest.py.
+
+TOO_LARGE = settings.MAX_UPLOAD_BYTES + 1024 * 1024
+
+def test_login_rate_limit_returns_429_with_retry_after(client: TestClient, db: Session) -> None:
+    login_data = {"username": "nobody@example.com", "password": "wrong"}
+    for _ in range(settings.AUTH_RATE_LIMIT_PER_MINUTE):
+        assert client.post("/auth/login", data=login_data).status_code == 401
+
+    response = client.post("/auth/login", data=login_data)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+def test_busy_expensive_routes_return_503(client: TestClient, db: Session) -> None:
+    held = 0
+    while expensive_routes.try_acquire():
+        held += 1
+    try:
+        response = client.post("/auth/login", data={"username": "busy@example.com", "password": "pw"})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+    finally:
+        for _ in range(held):
+            expensive_routes.release()
+
+def test_oversized_body_returns_413(client: TestClient, db: Session) -> None:
+    auth_headers = get_auth_headers(client, db, username="bigupload", email="bigupload@example.com")
+    headers = {**auth_headers, "Origin": "http://localhost:3000"}
+    response = client.post("/posts/", headers=headers, content=b"x" * TOO_LARGE)
+    assert response.status_code == 413
+    # The frontend dev server must be able to read the error
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+
+def test_oversized_chunked_body_returns_413(client: TestClient, db: Session) -> None:
+    auth_headers = get_auth_headers(client, db, username="chunked", email="chunked@example.com")
+    chunk = b"x" * (256 * 1024)
+
+    def body():
+        for _ in range(TOO_LARGE // len(chunk) + 1):
+            yield chunk
+
+    headers = {**auth_headers, "Content-Type": "multipart/form-data; boundary=xyz"}
+    response = client.post("/posts/", headers=headers, content=body())
+    assert response.status_code == 413
@@ -0,0 +1,79 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.crud import create_user
+from app.schemas import UserCreate
+
+# Assumes the TestClient (client) and Session (db) fixtures from conftest.py.
+
+def get_auth_headers(client: TestClient, db: Session, username: str, email: str, password: str = "password123") -> dict:
+    create_user(db, UserCreate(username=username, email=email, password=password))
+    response = client.post("/auth/login", data={"username": email, "password": password})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_feed_returns_304_when_unchanged(client: TestClient, db: Session) -> None:
+    for path in ("/posts/", "/posts/homepage"):
+        response = client.get(path)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+def test_feed_etag_changes_after_writes(client: TestClient, db: Session) -> None:
+    auth_headers = get_auth_headers(client, db, username="etaguser", email="etag@example.com")
+    etag = client.get("/posts/").headers["etag"]
+
+    post = client.post("/posts/", headers=auth_headers, data={"title": "New bowl"}).json()
+    response = client.get("/posts/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [p["id"] for p in response.json()] == [post["id"]]
+    etag = response.headers["etag"]
+
+    client.post(f"/posts/{post['id']}/like", headers=auth_headers)
+    response = client.get("/posts/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["like_count"] == 1
+
+def test_update_post_requires_owner(client: TestClient, db: Session) -> None:
+    owner_headers = get_auth_headers(client, db, username="editowner", email="editowner@example.com")
+    other_headers = get_auth_headers(client, db, username="editother", email="editother@example.com")
+    post = client.post("/posts/", headers=owner_headers, data={"title": "Draft"}).json()
+
+    response = client.put(f"/posts/{post['id']}", headers=other_headers, json={"title": "Hijacked"})
+    assert response.status_code == 403
+
+    response = client.put(f"/posts/{post['id']}", headers=owner_headers, json={"title": "Final", "text_content": "Fired at cone 6"})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Final"
+    assert response.json()["text_content"] == "Fired at cone 6"
+
+def test_deleted_post_is_hidden_and_cleaned_up(client: TestClient, db: Session) -> None:
+    owner_headers = get_auth_headers(client, db, username="delowner", email="delowner@example.com")
+    fan_headers = get_auth_headers(client, db, username="delfan", email="delfan@example.com")
+    post = client.post("/posts/", headers=owner_headers, data={"title": "Cracked mug"}).json()
+    client.post(f"/posts/{post['id']}/like", headers=fan_headers)
+
+    response = client.delete(f"/posts/{post['id']}", headers=owner_headers)
+    assert response.status_code == 204
+
+    assert client.get(f"/posts/{post['id']}").status_code == 404
+    assert client.post(f"/posts/{post['id']}/like", headers=fan_headers).status_code == 404
+    assert post["id"] not in [p["id"] for p in client.get("/posts/").json()]
+    assert post["id"] not in [p["id"] for p in client.get("/posts/homepage").json()]
+    # The TestClient runs background tasks before returning, so the reaper is done
+    db.expire_all()
+    assert crud.get_like_count_for_post(db, post["id"]) == 0
+
+def test_list_views_include_owner_bio(client: TestClient, db: Session) -> None:
+    auth_headers = get_auth_headers(client, db, username="biopotter", email="biopotter@example.com")
+    client.put("/users/me", headers=auth_headers, json={"bio": "Raku and pit firing"})
+    post = client.post("/posts/", headers=auth_headers, data={"title": "Raku jar"}).json()
+
+    assert client.get(f"/posts/{post['id']}").json()["owner"]["bio"] == "Raku and pit firing"
+    for path in ("/posts/", "/posts/homepage"):
+        assert client.get(path).json()[0]["owner"]["bio"] == "Raku and pit firing"
@@ -19,7 +19,7 @@ def get_auth_headers(client: TestClient, db: Session, username: str = "testlogin
         create_user(db, UserCreate(username=username, email=email, password=password))
     
     login_data = {"username": email, "password": password} # FastAPI's default OAuth2PasswordRequestForm uses username
-    response = client.post("/auth/token", data=login_data) # Adjust endpoint if different
+    response = client.post("/auth/login", data=login_data)
     if response.status_code != 200:
         print(f"Login failed: {response.json()}")
     assert response.status_code == 200
@@ -83,6 +83,23 @@ def test_update_current_user_password(client: TestClient, db: Session) -> None:
     db_user = get_user_by_email(db, email=email)
     assert verify_password(new_password, db_user.hashed_password)
 
+def test_password_change_returns_new_refresh_token(client: TestClient, db: Session) -> None:
+    email = "rotatepassapi@example.com"
+    create_user(db, UserCreate(username="rotatepassuser", email=email, password="oldpassword"))
+    tokens = client.post("/auth/login", data={"username": email, "password": "oldpassword"}).json()
+    auth_headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    response = client.put("/users/me", headers=auth_headers, json={"bio": "No password change"})
+    assert response.json()["refresh_token"] is None
+
+    response = client.put("/users/me", headers=auth_headers, json={"password": "newpassword"})
+    assert response.status_code == 200
+    new_refresh_token = response.json()["refresh_token"]
+
+    # The caller keeps its session; tokens from before the change are signed out
+    assert client.post("/auth/refresh", json={"refresh_token": new_refresh_token}).status_code == 200
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
 def test_update_current_user_all_fields(client: TestClient, db: Session) -> None:
     email = "updateallapi@example.com"
     username = "allapiuser"
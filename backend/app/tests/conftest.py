@@ -0,0 +1,44 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Point the app at a throwaway SQLite database before anything imports
+# app.core.config; the settings are read from the environment at import time.
+_test_dir = Path(tempfile.mkdtemp(prefix="pottery-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_test_dir / 'test.db'}"
+os.environ["CACHE_BACKEND"] = "memory"
+
+from fastapi.testclient import TestClient # noqa: E402
+
+from app import models # noqa: E402
+from app.core.cache import get_cache # noqa: E402
+from app.core.config import settings # noqa: E402
+from app.core.security import verified_tokens # noqa: E402
+from app.db.database import SessionLocal, engine # noqa: E402
+from app.main import app # noqa: E402
+from app.routers import posts # noqa: E402
+
+@pytest.fixture()
+def db():
+    """A session on an empty database. Tables are recreated for every test."""
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    # Rate-limit buckets, the feed version and verified tokens must not leak between tests
+    get_cache().clear()
+    verified_tokens.clear()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture()
+def client(db, tmp_path, monkeypatch):
+    # Keep uploaded and reaped images out of the real uploads directory
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir()
+    monkeypatch.setattr(settings, "UPLOADS_DIR", str(uploads_dir))
+    monkeypatch.setattr(posts, "UPLOADS_DIR", uploads_dir)
+    return TestClient(app)
@@ -0,0 +1,175 @@
+import io
+import tarfile
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import bulk, crud, models
+from app.db.database import SessionLocal
+from app.schemas import CommentCreate, PostCreate, UserCreate
+
+def export_to_bytes(db: Session, uploads_dir) -> bytes:
+    return b"".join(bulk.export_archive(db, uploads_dir))
+
+def test_export_archive_layout(db: Session, tmp_path) -> None:
+    user = crud.create_user(db, UserCreate(username="exporter", email="exporter@example.com", password="pw"))
+    (tmp_path / "bowl.jpg").write_bytes(b"jpeg")
+    crud.create_post(db, PostCreate(title="Bowl"), owner_id=user.id, image_filename="bowl.jpg")
+
+    archive = tarfile.open(fileobj=io.BytesIO(export_to_bytes(db, tmp_path)))
+    assert archive.getnames() == ["manifest.json", "users/000000.ndjson", "posts/000000.ndjson", "images/bowl.jpg"]
+
+def test_import_roundtrip_remaps_ids(db: Session, tmp_path) -> None:
+    owner = crud.create_user(db, UserCreate(username="potter", email="potter@example.com", password="pw"))
+    fan = crud.create_user(db, UserCreate(username="fan", email="fan@example.com", password="pw"))
+    post = crud.create_post(db, PostCreate(title="Vase", text_content="Celadon"), owner_id=owner.id)
+    crud.create_like(db, owner_id=fan.id, post_id=post.id)
+    crud.create_comment(db, CommentCreate(text="Nice!"), owner_id=fan.id, post_id=post.id)
+    data = export_to_bytes(db, tmp_path)
+
+    # Importing into the same database matches users by email and adds copies of the posts
+    counts = bulk.import_archive(db, io.BytesIO(data), tmp_path)
+    assert counts == {"users": 0, "posts": 1, "likes": 1, "comments": 1, "images": 0}
+
+    copy = db.query(models.Post).filter(models.Post.id != post.id).one()
+    assert copy.title == "Vase"
+    assert copy.owner_id == owner.id
+    assert crud.get_like_count_for_post(db, copy.id) == 1
+    assert [c.text for c in crud.get_comments_for_post(db, copy.id)] == ["Nice!"]
+
+def test_import_ignores_image_paths(db: Session, tmp_path) -> None:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        info = tarfile.TarInfo("images/../escape.jpg")
+        info.size = 4
+        tar.addfile(info, io.BytesIO(b"evil"))
+    buffer.seek(0)
+
+    counts = bulk.import_archive(db, buffer, tmp_path / "uploads")
+    assert counts["images"] == 0
+    assert not (tmp_path / "escape.jpg").exists()
+
+def test_import_rejects_unknown_owner(db: Session, tmp_path) -> None:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        data = b'{"id": 1, "owner_id": 99, "title": "Orphan"}\n'
+        info = tarfile.TarInfo("posts/000000.ndjson")
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+
+    with pytest.raises(ValueError):
+        bulk.import_archive(db, buffer, tmp_path)
+
+def test_import_drops_image_filename_paths(db: Session, tmp_path) -> None:
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir()
+    (tmp_path / "secret.txt").write_bytes(b"secret")
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, line in (
+            ("users/000000.ndjson", b'{"id": 1, "email": "sneaky@example.com", "username": "sneaky", "hashed_password": "x"}\n'),
+            ("posts/000000.ndjson", b'{"id": 1, "owner_id": 1, "title": "Sneaky", "image_filename": "../secret.txt"}\n'),
+        ):
+            info = tarfile.TarInfo(name)
+            info.size = len(line)
+            tar.addfile(info, io.BytesIO(line))
+    buffer.seek(0)
+
+    bulk.import_archive(db, buffer, uploads_dir)
+    assert db.query(models.Post).one().image_filename is None
+
+def test_export_skips_images_outside_uploads_dir(db: Session, tmp_path) -> None:
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir()
+    (tmp_path / "secret.txt").write_bytes(b"secret")
+    user = crud.create_user(db, UserCreate(username="legacy", email="legacy@example.com", password="pw"))
+    # A row written before imports checked image names
+    crud.create_post(db, PostCreate(title="Legacy"), owner_id=user.id, image_filename="../secret.txt")
+
+    archive = tarfile.open(fileobj=io.BytesIO(export_to_bytes(db, uploads_dir)))
+    assert not [name for name in archive.getnames() if name.startswith("images/")]
+
+def test_import_uses_database_ids(db: Session, tmp_path) -> None:
+    owner = crud.create_user(db, UserCreate(username="idowner", email="idowner@example.com", password="pw"))
+    importer = bulk._Importer(db, tmp_path)
+
+    # The live app creates a post while the import runs
+    other_db = SessionLocal()
+    try:
+        racer = crud.create_post(other_db, PostCreate(title="Racer"), owner_id=owner.id)
+    finally:
+        other_db.close()
+
+    importer.add_users([{"id": 7, "email": owner.email, "username": owner.username}])
+    importer.add_posts([{"id": 1, "owner_id": 7, "title": "Imported", "likes": [{"owner_id": 7}]}])
+    db.commit()
+
+    imported = db.query(models.Post).filter(models.Post.title == "Imported").one()
+    assert imported.id != racer.id
+    assert crud.get_like_count_for_post(db, imported.id) == 1
+
+def test_failed_import_adds_nothing(db: Session, tmp_path) -> None:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, data in (
+            ("users/000000.ndjson", b'{"id": 1, "email": "partial@example.com", "username": "partial", "hashed_password": "x"}\n'),
+            ("images/partial.jpg", b"jpeg"),
+            ("posts/000000.ndjson", b'{"id": 1, "owner_id": 1, "title": "Kept?"}\n'),
+            # The same like twice violates the unique constraint
+            ("posts/000001.ndjson", b'{"id": 2, "owner_id": 1, "title": "Bad", "likes": [{"owner_id": 1}, {"owner_id": 1}]}\n'),
+        ):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+
+    with pytest.raises(IntegrityError):
+        bulk.import_archive(db, buffer, tmp_path)
+    assert db.query(models.User).count() == 0
+    assert db.query(models.Post).count() == 0
+    assert not (tmp_path / "partial.jpg").exists()
+
+def test_import_without_timestamps_uses_server_defaults(db: Session, tmp_path) -> None:
+    owner = crud.create_user(db, UserCreate(username="stamped", email="stamped@example.com", password="pw"))
+    importer = bulk._Importer(db, tmp_path)
+    importer.add_users([
+        {"id": 1, "email": owner.email, "username": owner.username},
+        {"id": 2, "email": "unstamped@example.com", "username": "unstamped", "hashed_password": "x"},
+    ])
+    importer.add_posts([
+        {"id": 1, "owner_id": 2, "title": "Dated", "created_at": "2024-05-01T10:00:00", "likes": [{"owner_id": 1}]},
+        {"id": 2, "owner_id": 1, "title": "Undated", "comments": [{"owner_id": 2, "text": "When?"}]},
+    ])
+    db.commit()
+
+    posts = {post.title: post for post in db.query(models.Post)}
+    assert [posts["Dated"].owner.username, posts["Undated"].owner.username] == ["unstamped", "stamped"]
+    assert posts["Dated"].created_at.year == 2024
+    assert posts["Undated"].created_at is not None
+    assert posts["Dated"].owner.created_at is not None
+    assert all(row.created_at is not None for row in db.query(models.Like))
+    assert all(row.created_at is not None for row in db.query(models.Comment))
+
+def test_export_is_a_consistent_snapshot(db: Session, tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(bulk, "BATCH_SIZE", 1)
+    owner = crud.create_user(db, UserCreate(username="snapowner", email="snapowner@example.com", password="pw"))
+    crud.create_post(db, PostCreate(title="One"), owner_id=owner.id)
+    post = crud.create_post(db, PostCreate(title="Two"), owner_id=owner.id)
+
+    chunks = bulk.export_archive(db, tmp_path)
+    data = [next(chunks), next(chunks)] # Manifest and the users batch are written
+
+    # Someone signs up and likes a post the export has not reached yet
+    other_db = SessionLocal()
+    try:
+        latecomer = crud.create_user(other_db, UserCreate(username="latecomer", email="latecomer@example.com", password="pw"))
+        crud.create_like(other_db, owner_id=latecomer.id, post_id=post.id)
+    finally:
+        other_db.close()
+    data.extend(chunks)
+
+    counts = bulk.import_archive(db, io.BytesIO(b"".join(data)), tmp_path)
+    assert counts["posts"] == 2
+    assert counts["likes"] == 0
@@ -0,0 +1,151 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from app.core import cache
+from app.core.cache import BusHub, LocalBus, MemoryCache
+
+# The shared-backend tests run a real cache server on a temporary Unix socket
+# as a local stand-in for the one gunicorn starts.
+
+@pytest.fixture
+def cache_server(tmp_path):
+    address = str(tmp_path / "cache.sock")
+    manager = cache.start_server(address=address, authkey="test-key")
+    yield address
+    manager.shutdown()
+
+def test_memory_cache_get_set_delete() -> None:
+    store = MemoryCache()
+    assert store.get("missing") is None
+    assert store.get("missing", 42) == 42
+
+    store.set("key", {"a": 1})
+    assert store.get("key") == {"a": 1}
+    assert store.delete("key") is True
+    assert store.delete("key") is False
+    assert store.get("key") is None
+
+def test_memory_cache_ttl_expires() -> None:
+    store = MemoryCache()
+    store.set("short", "value", ttl=0.05)
+    assert store.get("short") == "value"
+    time.sleep(0.1)
+    assert store.get("short") is None
+
+def test_memory_cache_incr() -> None:
+    store = MemoryCache()
+    assert store.incr("counter") == 1
+    assert store.incr("counter", 5) == 6
+
+def test_local_bus_delivers_to_subscribers() -> None:
+    bus = LocalBus()
+    received = []
+    bus.subscribe("invalidate", received.append)
+    bus.publish("invalidate", "posts")
+    bus.publish("other", "ignored")
+    bus.unsubscribe("invalidate", received.append)
+    bus.publish("invalidate", "after-unsubscribe")
+    assert received == ["posts"]
+
+def test_bus_hub_poll_times_out_empty() -> None:
+    hub = BusHub()
+    mailbox_id = hub.open()
+    hub.listen(mailbox_id, "invalidate")
+    assert hub.poll(mailbox_id, timeout=0.01) == []
+    hub.publish("invalidate", 1)
+    assert hub.poll(mailbox_id, timeout=0.01) == [("invalidate", 1)]
+    hub.close(mailbox_id)
+    assert hub.poll(mailbox_id, timeout=0.01) is None
+
+def test_shared_cache_is_coherent_across_clients(cache_server) -> None:
+    store_a, _ = cache.connect(address=cache_server, authkey="test-key")
+    store_b, _ = cache.connect(address=cache_server, authkey="test-key")
+
+    store_a.set("feed", [1, 2, 3])
+    assert store_b.get("feed") == [1, 2, 3]
+
+    store_a.incr("hits")
+    store_b.incr("hits")
+    assert store_a.get("hits") == 2
+
+    store_b.delete("feed")
+    assert store_a.get("feed") is None
+
+def test_shared_bus_invalidates_other_clients(cache_server) -> None:
+    _, bus_a = cache.connect(address=cache_server, authkey="test-key")
+    _, bus_b = cache.connect(address=cache_server, authkey="test-key")
+
+    received = []
+    delivered = threading.Event()
+
+    def on_message(message):
+        received.append(message)
+        delivered.set()
+
+    bus_b.subscribe("invalidate", on_message)
+    bus_a.publish("invalidate", {"key": "feed"})
+
+    assert delivered.wait(timeout=5)
+    assert received == [{"key": "feed"}]
+
+def test_shared_backend_recovers_after_server_restart(tmp_path) -> None:
+    address = str(tmp_path / "cache.sock")
+    manager = cache.start_server(address=address, authkey="test-key")
+    store, bus = cache.connect(address=address, authkey="test-key")
+    received = []
+    delivered = threading.Event()
+
+    def on_message(message):
+        received.append(message)
+        delivered.set()
+
+    bus.subscribe("invalidate", on_message)
+    store.set("feed", 1)
+
+    manager.shutdown()
+    with pytest.raises((EOFError, OSError)):
+        store.get("feed")
+
+    manager = cache.start_server(address=address, authkey="test-key")
+    try:
+        assert store.get("feed") is None # A fresh server starts empty
+        store.set("feed", 2)
+        assert store.get("feed") == 2
+
+        # The listener reopens its mailbox on the new server; publish until it has
+        deadline = time.monotonic() + 10
+        while not delivered.is_set() and time.monotonic() < deadline:
+            bus.publish("invalidate", {"key": "feed"})
+            delivered.wait(timeout=0.2)
+        assert received and received[0] == {"key": "feed"}
+    finally:
+        manager.shutdown()
+
+def _serve_in_process(address: str) -> multiprocessing.Process:
+    process = multiprocessing.Process(target=cache.serve, args=(address, "test-key"), daemon=True)
+    process.start()
+    deadline = time.monotonic() + 10
+    while not cache.ping(address=address, authkey="test-key"):
+        assert time.monotonic() < deadline, "cache server did not start"
+        time.sleep(0.05)
+    return process
+
+def test_shared_cache_reconnects_on_first_call_after_server_is_killed(tmp_path) -> None:
+    address = str(tmp_path / "cache.sock")
+    server = _serve_in_process(address)
+    store, _ = cache.connect(address=address, authkey="test-key")
+    store.set("feed", 1)
+
+    # As under gunicorn: the server dies without this process noticing, and a
+    # new one is up before the next call
+    server.kill()
+    server.join()
+    server = _serve_in_process(address)
+    try:
+        assert store.get("feed") is None
+    finally:
+        server.kill()
+        server.join()
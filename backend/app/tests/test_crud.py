@@ -1,4 +1,5 @@
 import pytest
+from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from fastapi.encoders import jsonable_encoder
 
@@ -73,6 +74,47 @@ def test_update_user_no_changes(db: Session) -> None:
     assert updated_user_model.bio == user.bio # Assuming default is None
     assert updated_user_model.hashed_password == original_hashed_password
 
+def test_rotate_refresh_token(db: Session) -> None:
+    user = create_test_user(db, username="refreshuser", email="refresh@example.com")
+    token = crud.create_user_refresh_token(db, owner_id=user.id)
+
+    rotated = crud.rotate_refresh_token(db, token)
+    assert rotated is not None
+    owner, new_token = rotated
+    assert owner.id == user.id
+    assert new_token != token
+
+    # The old token only works once
+    assert crud.rotate_refresh_token(db, token) is None
+
+def test_reused_refresh_token_revokes_all_sessions(db: Session) -> None:
+    user = create_test_user(db, username="reuseuser", email="reuse@example.com")
+    token = crud.create_user_refresh_token(db, owner_id=user.id)
+    _, new_token = crud.rotate_refresh_token(db, token)
+
+    assert crud.rotate_refresh_token(db, token) is None # Replay of a rotated token
+    assert crud.rotate_refresh_token(db, new_token) is None
+
+def test_refresh_tokens_are_stored_hashed(db: Session) -> None:
+    user = create_test_user(db, username="hashuser", email="hashed@example.com")
+    token = crud.create_user_refresh_token(db, owner_id=user.id)
+
+    db_token = crud.get_refresh_token(db, token)
+    assert db_token is not None
+    assert db_token.token_hash != token
+
+def test_expired_refresh_tokens_are_deleted(db: Session) -> None:
+    user = create_test_user(db, username="expireuser", email="expire@example.com")
+    old_token = crud.create_user_refresh_token(db, owner_id=user.id)
+    crud.get_refresh_token(db, old_token).expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+    # Issuing a new token sweeps the user's expired ones
+    new_token = crud.create_user_refresh_token(db, owner_id=user.id)
+    assert crud.get_refresh_token(db, old_token) is None
+    assert crud.get_refresh_token(db, new_token) is not None
+    assert crud.delete_expired_refresh_tokens(db) == 0
+
 # Note: This test setup assumes that `db: Session` is a fixture that provides
 # a transactional database session for each test. You would typically configure this
 # in a `conftest.py` file. If your setup is different, these tests might need adjustment.
@@ -0,0 +1,65 @@
+import asyncio
+
+from app import events
+from app.core.cache import LocalBus
+from app.events import EventBroadcaster
+
+def like_event(post_id: int, like_count: int, version: int = 0) -> dict:
+    return {"type": events.LIKE_COUNT_CHANGED, "data": {"post_id": post_id, "like_count": like_count, "version": version or like_count}}
+
+def test_like_events_are_coalesced_per_post() -> None:
+    async def scenario():
+        bus = LocalBus()
+        broadcaster = EventBroadcaster(bus=bus, coalesce_seconds=0.05)
+        queue = broadcaster.listen()
+
+        for like_count in (1, 2, 3):
+            bus.publish(events.CHANNEL, like_event(1, like_count))
+        bus.publish(events.CHANNEL, like_event(2, 1))
+        bus.publish(events.CHANNEL, {"type": events.POST_CREATED, "data": {"id": 3}})
+
+        received = [await asyncio.wait_for(queue.get(), timeout=1) for _ in range(3)]
+        await asyncio.sleep(0.1)
+        assert queue.empty()
+        return received
+
+    received = asyncio.run(scenario())
+    # New posts go out immediately; the like burst arrives as one event per post
+    assert received == [
+        {"type": events.POST_CREATED, "data": {"id": 3}},
+        like_event(1, 3),
+        like_event(2, 1),
+    ]
+
+def test_stale_like_events_are_dropped() -> None:
+    async def scenario():
+        bus = LocalBus()
+        broadcaster = EventBroadcaster(bus=bus, coalesce_seconds=0.05)
+        queue = broadcaster.listen()
+
+        # Two concurrent likes whose events arrive newest first
+        bus.publish(events.CHANNEL, like_event(1, 2, version=11))
+        bus.publish(events.CHANNEL, like_event(1, 1, version=10))
+        first = await asyncio.wait_for(queue.get(), timeout=1)
+        # A straggler arriving after the flush is dropped too
+        bus.publish(events.CHANNEL, like_event(1, 0, version=9))
+        await asyncio.sleep(0.1)
+        assert queue.empty()
+        return first
+
+    assert asyncio.run(scenario()) == like_event(1, 2, version=11)
+
+def test_slow_client_is_told_to_resync() -> None:
+    async def scenario():
+        bus = LocalBus()
+        broadcaster = EventBroadcaster(bus=bus, queue_size=2)
+        queue = broadcaster.listen()
+        for post_id in range(3):
+            bus.publish(events.CHANNEL, {"type": events.POST_CREATED, "data": {"id": post_id}})
+        await asyncio.sleep(0.01)
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    assert asyncio.run(scenario()) == [{"type": events.RESYNC, "data": {}}]
+
+def test_format_sse() -> None:
+    assert events.format_sse(like_event(1, 2)) == 'event: like_count_changed\ndata: {"post_id": 1, "like_count": 2, "version": 2}\n\n'
@@ -0,0 +1,35 @@
+import time
+
+from app.core.cache import MemoryCache
+from app.core.ratelimit import ConcurrencyLimiter
+
+def test_take_allows_burst_then_rejects() -> None:
+    store = MemoryCache()
+    for _ in range(3):
+        assert store.take("bucket", rate=1.0, capacity=3) == 0.0
+
+    retry_after = store.take("bucket", rate=1.0, capacity=3)
+    assert 0.0 < retry_after <= 1.0
+
+def test_take_refills_over_time() -> None:
+    store = MemoryCache()
+    assert store.take("bucket", rate=20.0, capacity=1) == 0.0
+    assert store.take("bucket", rate=20.0, capacity=1) > 0.0
+    time.sleep(0.06)
+    assert store.take("bucket", rate=20.0, capacity=1) == 0.0
+
+def test_take_buckets_are_independent() -> None:
+    store = MemoryCache()
+    assert store.take("ip-a", rate=1.0, capacity=1) == 0.0
+    assert store.take("ip-a", rate=1.0, capacity=1) > 0.0
+    assert store.take("ip-b", rate=1.0, capacity=1) == 0.0
+
+def test_concurrency_limiter_caps_active_requests() -> None:
+    limiter = ConcurrencyLimiter(2)
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert limiter.active == 2
+
+    limiter.release()
+    assert limiter.try_acquire()
@@ -0,0 +1,28 @@
+from sqlalchemy.orm import Session
+
+from app import crud, models, reaper
+from app.schemas import CommentCreate, PostCreate, UserCreate
+
+def test_purge_posts_removes_children_and_unused_images(db: Session, tmp_path) -> None:
+    user = crud.create_user(db, UserCreate(username="reaped", email="reaped@example.com", password="pw"))
+    (tmp_path / "gone.jpg").write_bytes(b"jpeg")
+    (tmp_path / "shared.jpg").write_bytes(b"jpeg")
+    deleted = crud.create_post(db, PostCreate(title="Gone"), owner_id=user.id, image_filename="gone.jpg")
+    deleted_copy = crud.create_post(db, PostCreate(title="Copy"), owner_id=user.id, image_filename="shared.jpg")
+    live = crud.create_post(db, PostCreate(title="Live"), owner_id=user.id, image_filename="shared.jpg")
+    crud.create_like(db, owner_id=user.id, post_id=deleted.id)
+    crud.create_comment(db, CommentCreate(text="Bye"), owner_id=user.id, post_id=deleted.id)
+    crud.create_like(db, owner_id=user.id, post_id=live.id)
+    crud.soft_delete_post(db, deleted)
+    crud.soft_delete_post(db, deleted_copy)
+
+    counts = reaper.purge_posts(db, crud.get_deleted_post_ids(db), tmp_path)
+
+    assert counts == {"likes": 1, "comments": 1, "images": 1}
+    assert not (tmp_path / "gone.jpg").exists()
+    assert (tmp_path / "shared.jpg").exists() # Still used by the live post
+    assert crud.get_like_count_for_post(db, live.id) == 1
+    assert db.query(models.Post).filter(models.Post.id == deleted.id).one().image_filename is None
+
+    # Running again finds nothing left to do
+    assert reaper.purge_posts(db, crud.get_deleted_post_ids(db), tmp_path) == {"likes": 0, "comments": 0, "images": 0}
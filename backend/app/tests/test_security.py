@@ -0,0 +1,35 @@
+import time
+from datetime import timedelta
+
+from app.core import security
+from app.core.security import VerifiedTokenCache
+
+def test_verified_token_cache_evicts_least_recently_used() -> None:
+    cache = VerifiedTokenCache(maxsize=2)
+    expires_at = time.time() + 60
+    cache.put("token-a", "a@example.com", expires_at)
+    cache.put("token-b", "b@example.com", expires_at)
+    assert cache.get("token-a") == "a@example.com" # token-b is now least recently used
+
+    cache.put("token-c", "c@example.com", expires_at)
+    assert cache.get("token-b") is None
+    assert cache.get("token-a") == "a@example.com"
+    assert cache.get("token-c") == "c@example.com"
+
+def test_verified_token_cache_drops_expired_tokens() -> None:
+    cache = VerifiedTokenCache(maxsize=2)
+    cache.put("token", "a@example.com", time.time() - 1)
+    assert cache.get("token") is None
+
+def test_decode_access_token_uses_cache() -> None:
+    security.verified_tokens.clear()
+    token = security.create_access_token(data={"sub": "cached@example.com"})
+    assert security.decode_access_token(token) == "cached@example.com"
+    assert security.verified_tokens.get(token) == "cached@example.com"
+    assert security.decode_access_token(token) == "cached@example.com"
+
+def test_decode_access_token_rejects_expired_token() -> None:
+    security.verified_tokens.clear()
+    token = security.create_access_token(data={"sub": "old@example.com"}, expires_delta=timedelta(minutes=-1))
+    assert security.decode_access_token(token) is None
+    assert security.verified_tokens.get(token) is None
@@ -0,0 +1,97 @@
+"""Export and re-import of a large class: time and peak Python memory.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_bulk [number_of_posts]
+
+Seeds a throwaway SQLite database with 100k posts by default, exports it to
+a tar archive and imports that into a second empty database. Timings include
+tracemalloc's overhead, so they are pessimistic.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+workdir = Path(tempfile.mkdtemp())
+os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/source.db"
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import bulk, crud, models  # noqa: E402
+from app.db.database import SessionLocal, engine  # noqa: E402
+
+USERS = 100
+BATCH = 5000
+
+
+def seed(db, posts: int) -> None:
+    now = datetime.utcnow()
+    crud.bulk_insert(db, models.User, [
+        {"id": i, "email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": "x", "created_at": now}
+        for i in range(1, USERS + 1)
+    ])
+    for start in range(1, posts + 1, BATCH):
+        ids = range(start, min(start + BATCH, posts + 1))
+        crud.bulk_insert(db, models.Post, [
+            {"id": i, "title": f"Post {i}", "text_content": "Glazed stoneware bowl. " * 10,
+             "owner_id": i % USERS + 1, "created_at": now}
+            for i in ids
+        ])
+        crud.bulk_insert(db, models.Like, [
+            {"post_id": i, "owner_id": (i * 7) % USERS + 1, "created_at": now} for i in ids if i % 3 == 0
+        ])
+        crud.bulk_insert(db, models.Comment, [
+            {"post_id": i, "owner_id": (i * 11) % USERS + 1, "text": "Lovely glaze!", "created_at": now}
+            for i in ids if i % 5 == 0
+        ])
+    db.commit()
+
+
+def measure(label: str, func) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<8} {elapsed:8.2f} s   peak {peak / 1024 / 1024:7.1f} MB   {result}")
+
+
+def main() -> None:
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    models.Base.metadata.create_all(bind=engine)
+    source = SessionLocal()
+    seed(source, posts)
+
+    archive = workdir / "export.tar"
+    uploads = workdir / "uploads"
+    uploads.mkdir()
+
+    def export():
+        with archive.open("wb") as out:
+            for chunk in bulk.export_archive(source, uploads):
+                out.write(chunk)
+        return f"{archive.stat().st_size / 1024 / 1024:.1f} MB archive"
+
+    target_engine = create_engine(f"sqlite:///{workdir}/target.db")
+    models.Base.metadata.create_all(bind=target_engine)
+    target = sessionmaker(bind=target_engine)()
+
+    def import_():
+        with archive.open("rb") as source_file:
+            return bulk.import_archive(target, source_file, uploads)
+
+    print(f"{posts} posts")
+    measure("export", export)
+    measure("import", import_)
+    source.close()
+    target.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Memory and time per request for the post list views, comparing full ORM
+entity hydration (the previous implementation) with column projections.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_list_views
+
+Each measurement covers the queries plus validating into schemas.Post and
+dumping JSON, as FastAPI does for the response.
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import List
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_list_views.db"
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import desc  # noqa: E402
+
+from app import crud, models, schemas  # noqa: E402
+from app.db.database import SessionLocal, engine  # noqa: E402
+
+POSTS = 5000
+USERS = 200
+PAGE_SIZES = (10, 100, 500)
+REPEAT = 5
+
+posts_adapter = TypeAdapter(List[schemas.Post])
+
+
+def seed(db) -> None:
+    now = datetime.utcnow()
+    crud.bulk_insert(db, models.User, [
+        {"id": i, "email": f"user{i}@example.com", "username": f"user{i}",
+         "hashed_password": "$2b$12$" + "x" * 53, "bio": "Wheel-thrown stoneware. " * 40, "created_at": now}
+        for i in range(1, USERS + 1)
+    ])
+    crud.bulk_insert(db, models.Post, [
+        {"id": i, "title": f"Post {i}", "text_content": "Notes on glaze chemistry and firing. " * 60,
+         "owner_id": i % USERS + 1, "created_at": now}
+        for i in range(1, POSTS + 1)
+    ])
+    crud.bulk_insert(db, models.Like, [
+        {"post_id": i, "owner_id": j, "created_at": now} for i in range(1, POSTS + 1) for j in range(1, i % 7 + 1)
+    ])
+    db.commit()
+
+
+def entity_page(db, limit: int):
+    # The previous implementation: full entities plus one like count query per post
+    posts = db.query(models.Post).order_by(desc(models.Post.created_at)).limit(limit).all()
+    return [crud.enrich_post_with_like_count(db, post) for post in posts]
+
+
+def projected_page(db, limit: int, preview_chars=None):
+    return crud.get_posts(db, limit=limit, preview_chars=preview_chars)
+
+
+def measure(db, page, limit: int, **kwargs):
+    def request():
+        db.expunge_all() # Each request starts with an empty session, as with get_db
+        items = page(db, limit, **kwargs)
+        return posts_adapter.dump_json(posts_adapter.validate_python(items, from_attributes=True))
+
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        body = request()
+    elapsed = (time.perf_counter() - started) / REPEAT
+
+    tracemalloc.start()
+    request()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024, len(body) / 1024
+
+
+def main() -> None:
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    seed(db)
+
+    print(f"{'page':>5}  {'variant':<22} {'time':>9}  {'peak memory':>12}  {'body':>9}")
+    for limit in PAGE_SIZES:
+        for label, page, kwargs in (
+            ("ORM entities", entity_page, {}),
+            ("projection", projected_page, {}),
+            ("projection, 200 chars", projected_page, {"preview_chars": 200}),
+        ):
+            ms, peak_kb, body_kb = measure(db, page, limit, **kwargs)
+            print(f"{limit:>5}  {label:<22} {ms:7.1f} ms  {peak_kb:9.0f} KB  {body_kb:6.0f} KB")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
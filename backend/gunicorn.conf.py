@@ -0,0 +1,71 @@
+# Gunicorn settings for running several uvicorn workers:
+#
+#     gunicorn -c gunicorn.conf.py app.main:app
+#
+# The app is preloaded in the master so workers fork with it already imported,
+# and the shared cache server is started before the first worker so caches,
+# rate limits and invalidation messages stay coherent across workers. The
+# master restarts the cache server if it dies; workers reconnect by themselves.
+import os
+import signal
+import threading
+import time
+
+os.environ.setdefault("CACHE_BACKEND", "shared")
+
+from app.core import cache  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = settings.WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+CACHE_SERVER_CHECK_SECONDS = 1.0
+
+_cache_server = None
+_stopping = False
+
+
+def on_starting(server):
+    global _cache_server
+    if settings.CACHE_BACKEND == "shared":
+        _cache_server = cache.start_server()
+        server.log.info("Shared cache server listening on %s", settings.CACHE_ADDRESS)
+
+
+def _watch_cache_server(server):
+    global _cache_server
+    while not _stopping:
+        time.sleep(CACHE_SERVER_CHECK_SECONDS)
+        # Ask the server itself: gunicorn reaps every child of the master, so
+        # the manager's own view of its process can't tell that it exited
+        if _stopping or cache.ping():
+            continue
+        server.log.error("Shared cache server is not answering, restarting it")
+        try:
+            _cache_server.shutdown() # Stop a hung server; a dead one is just cleaned up
+            _cache_server = cache.start_server()
+        except Exception:
+            # Without a cache server every worker would fail its requests; stop instead
+            server.log.exception("Could not restart the shared cache server, shutting down")
+            os.kill(os.getpid(), signal.SIGTERM)
+            return
+
+
+def when_ready(server):
+    if _cache_server is not None:
+        threading.Thread(target=_watch_cache_server, args=(server,), name="cache-server-watch", daemon=True).start()
+
+
+def post_fork(server, worker):
+    # Don't reuse database connections opened by the master during preload
+    from app.db.database import engine
+    engine.dispose(close=False)
+
+
+def on_exit(server):
+    global _stopping
+    _stopping = True
+    if _cache_server is not None:
+        _cache_server.shutdown()
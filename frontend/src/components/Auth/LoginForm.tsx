@@ -15,7 +15,7 @@ const LoginForm: React.FC = () => {
         setError(null);
         try {
             const data = await loginUser({ email, password });
-            await login(data.access_token); // AuthContext handles token storage and user state
+            await login(data.access_token, data.refresh_token); // AuthContext handles token storage and user state
             navigate('/'); // Redirect to homepage after successful login
         } catch (err: any) {
             setError(err.response?.data?.detail || 'Login failed. Please try again.');
@@ -6,7 +6,7 @@ interface AuthContextType {
     user: User | null;
     token: string | null;
     isLoading: boolean;
-    login: (token: string) => Promise<void>;
+    login: (token: string, refreshToken?: string) => Promise<void>;
     logout: () => void;
     setUser: React.Dispatch<React.SetStateAction<User | null>>; // Add this
 }
@@ -41,18 +41,27 @@ export const AuthProvider: React.FC<{children: ReactNode}> = ({ children }) => {
         fetchUser();
     }, [token]);
 
-    const login = async (newToken: string) => {
+    const login = async (newToken: string, refreshToken?: string) => {
         setToken(newToken);
         localStorage.setItem('accessToken', newToken);
+        if (refreshToken) {
+            localStorage.setItem('refreshToken', refreshToken);
+        }
         // Fetch user data after login
         // const response = await apiClient.get<User>('/users/me');
         // setUser(response.data);
     };
 
     const logout = () => {
+        const refreshToken = localStorage.getItem('refreshToken');
+        if (refreshToken) {
+            // Revoke the session server-side; failures don't block logging out locally
+            apiClient.post('/auth/logout', { refresh_token: refreshToken }).catch(() => {});
+        }
         setUser(null);
         setToken(null);
         localStorage.removeItem('accessToken');
+        localStorage.removeItem('refreshToken');
     };
 
     return (
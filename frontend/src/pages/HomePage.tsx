@@ -1,8 +1,10 @@
 import React, { useEffect, useState } from 'react';
 import PostCard from '../components/Post/PostCard'; // Assuming you might use it here
-import { getHomepagePosts } from '../services/postService';
+import { getHomepagePosts, subscribeToPostEvents } from '../services/postService';
 import { Post } from '../types';
 
+const HOMEPAGE_LIMIT = 10;
+
 const HomePage: React.FC = () => {
     const [posts, setPosts] = useState<Post[]>([]);
     const [loading, setLoading] = useState<boolean>(true);
@@ -13,7 +15,7 @@ const HomePage: React.FC = () => {
             try {
                 setLoading(true);
                 setError(null);
-                const homepagePosts = await getHomepagePosts();
+                const homepagePosts = await getHomepagePosts(HOMEPAGE_LIMIT);
                 setPosts(homepagePosts);
             } catch (err) {
                 console.error("Failed to fetch homepage posts:", err);
@@ -24,6 +26,22 @@ const HomePage: React.FC = () => {
         };
 
         fetchPosts();
+
+        // Apply new posts and like counts as they happen rather than polling
+        const unsubscribe = subscribeToPostEvents({
+            // The homepage shows up to HOMEPAGE_LIMIT top-rated or random posts. A new post
+            // has no likes, so the server would only include it while there is room.
+            onPostCreated: (post) => setPosts(current =>
+                current.length < HOMEPAGE_LIMIT && !current.some(p => p.id === post.id) ? [post, ...current] : current
+            ),
+            onPostUpdated: (post) => setPosts(current => current.map(p => (p.id === post.id ? post : p))),
+            onPostDeleted: (postId) => setPosts(current => current.filter(p => p.id !== postId)),
+            onLikeCountChanged: (postId, likeCount) => setPosts(current =>
+                current.map(p => (p.id === postId ? { ...p, like_count: likeCount } : p))
+            ),
+            onResync: fetchPosts,
+        });
+        return unsubscribe;
     }, []);
     return (
         <div>
@@ -20,6 +20,56 @@ apiClient.interceptors.request.use((config) => {
     return Promise.reject(error);
 });
 
+// On a 401, exchange the refresh token for a new access token and retry once,
+// so users don't have to log in (and the server doesn't run bcrypt) every 30 minutes.
+let refreshRequest: Promise<string | null> | null = null;
+
+const refreshAccessToken = async (failedToken: string | null): Promise<string | null> => {
+    const refresh = async (): Promise<string | null> => {
+        // Another tab may have refreshed while this one waited for the lock
+        const currentToken = localStorage.getItem('accessToken');
+        if (currentToken && currentToken !== failedToken) {
+            return currentToken;
+        }
+        const refreshToken = localStorage.getItem('refreshToken');
+        if (!refreshToken) {
+            return null;
+        }
+        try {
+            const response = await axios.post(`${API_BASE_URL}/auth/refresh`, { refresh_token: refreshToken });
+            localStorage.setItem('accessToken', response.data.access_token);
+            localStorage.setItem('refreshToken', response.data.refresh_token);
+            return response.data.access_token;
+        } catch (error) {
+            // Only a rejected token ends the session; rate limits (429), 503s and
+            // network errors are transient and the next 401 will try again.
+            if (axios.isAxiosError(error) && error.response?.status === 401) {
+                localStorage.removeItem('refreshToken');
+            }
+            return null;
+        }
+    };
+    // Tabs share localStorage and a refresh token works only once (reusing it
+    // revokes every session), so only one tab may refresh at a time.
+    return navigator.locks ? navigator.locks.request('pottery-token-refresh', refresh) : refresh();
+};
+
+apiClient.interceptors.response.use((response) => response, async (error) => {
+    const originalRequest = error.config;
+    if (error.response?.status === 401 && originalRequest && !originalRequest._retried) {
+        originalRequest._retried = true;
+        const failedToken = (originalRequest.headers['Authorization'] || '').replace(/^Bearer /, '') || null;
+        // Share one refresh between concurrent failing requests, since each refresh token works only once
+        refreshRequest = refreshRequest || refreshAccessToken(failedToken).finally(() => { refreshRequest = null; });
+        const newToken = await refreshRequest;
+        if (newToken) {
+            originalRequest.headers['Authorization'] = `Bearer ${newToken}`;
+            return apiClient(originalRequest);
+        }
+    }
+    return Promise.reject(error);
+});
+
 export default apiClient;
 
 // Example image URL construction: `${API_BASE_URL}/uploads/images/${post.image_filename}`
\ No newline at end of file
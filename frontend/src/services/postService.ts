@@ -24,4 +24,52 @@ export const getHomepagePosts = async (limit: number = 10): Promise<Post[]> => {
     return response.data;
 };
 
+export interface PostEventHandlers {
+    onPostCreated?: (post: Post) => void;
+    onPostUpdated?: (post: Post) => void;
+    onPostDeleted?: (postId: number) => void;
+    onLikeCountChanged?: (postId: number, likeCount: number) => void;
+    onResync?: () => void; // Events were dropped or missed while reconnecting; refetch
+}
+
+// Live updates over server-sent events instead of re-fetching the feed.
+// Returns a function that closes the connection.
+export const subscribeToPostEvents = (handlers: PostEventHandlers): (() => void) => {
+    const source = new EventSource(`${apiClient.defaults.baseURL}/posts/events`);
+    source.addEventListener('post_created', (event) => {
+        handlers.onPostCreated?.(JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('post_updated', (event) => {
+        handlers.onPostUpdated?.(JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('post_deleted', (event) => {
+        handlers.onPostDeleted?.(JSON.parse((event as MessageEvent).data).post_id);
+    });
+    source.addEventListener('like_count_changed', (event) => {
+        const data = JSON.parse((event as MessageEvent).data);
+        handlers.onLikeCountChanged?.(data.post_id, data.like_count);
+    });
+    source.addEventListener('resync', () => handlers.onResync?.());
+    // EventSource reconnects by itself, but events sent while it was
+    // disconnected are lost, so refetch once it is back
+    let disconnected = false;
+    source.onerror = () => { disconnected = true; };
+    source.onopen = () => {
+        if (disconnected) {
+            disconnected = false;
+            handlers.onResync?.();
+        }
+    };
+    return () => source.close();
+};
+
+export const updatePost = async (postId: number, postData: { title: string; text_content?: string }): Promise<Post> => {
+    const response = await apiClient.put<Post>(`/posts/${postId}`, postData);
+    return response.data;
+};
+
+export const deletePost = async (postId: number): Promise<void> => {
+    await apiClient.delete(`/posts/${postId}`);
+};
+
 // You can add other post-related services here, like getPosts, getPostById, etc.
\ No newline at end of file
@@ -1,5 +1,5 @@
 import apiClient from './api'; // Assuming api.ts exports a configured axios instance
-import { User } from '../types'; // Assuming User type will be updated/available in types/index.ts
+import { User, UserUpdateResult } from '../types'; // Assuming User type will be updated/available in types/index.ts
 
 // Define a type for the update payload. This should align with backend's UserUpdate schema.
 export interface UserUpdatePayload {
@@ -15,7 +15,11 @@ const userService = {
   },
 
   updateUserProfile: async (userData: UserUpdatePayload): Promise<User> => {
-    const response = await apiClient.put<User>('/users/me', userData);
+    const response = await apiClient.put<UserUpdateResult>('/users/me', userData);
+    // A password change revokes all refresh tokens and returns a new one for this session
+    if (response.data.refresh_token) {
+      localStorage.setItem('refreshToken', response.data.refresh_token);
+    }
     return response.data;
   },
 };
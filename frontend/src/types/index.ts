@@ -7,6 +7,10 @@ export interface User {
     // provider?: string;
 }
 
+export interface UserUpdateResult extends User {
+    refresh_token?: string; // Only after a password change
+}
+
 export interface Post {
     id: number;
     title: string;
@@ -39,6 +43,7 @@ export interface Like {
 export interface TokenResponse {
     access_token: string;
     token_type: string;
+    refresh_token?: string;
 }
 
 // For forms